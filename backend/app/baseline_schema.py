@@ -0,0 +1,278 @@
+# app/baseline_schema.py
+"""The schema as migration 1 created it.
+
+This is a frozen copy, not the live models: later changes belong to the
+migration that makes them, so a fresh database and an upgraded one end up
+with the same objects. Do not edit these tables to match the models.
+"""
+from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text
+
+
+baseline = MetaData()
+
+Table(
+    "companies",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("company_name", String, nullable=False, unique=True),
+    Column("email", String, nullable=False, unique=True),
+    Column("owner_full_name", String, nullable=False),
+    Column("password_hash", String, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "oauth_states",
+    baseline,
+    Column("state", String, primary_key=True),
+    Column("provider", String, nullable=False),
+    Column("payload", JSON, nullable=False),
+    Column("expires", DateTime, nullable=False, index=True),
+)
+
+Table(
+    "tools",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False),
+    Column("description", String),
+    Column("link", String),
+    Column("logo_url", String),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "verification_tokens",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, nullable=False),
+    Column("token", String, nullable=False),
+    Column("created_at", DateTime),
+    Column("expires_at", DateTime),
+)
+
+Table(
+    "canva_integrations",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("canva_account_id", String, nullable=False),
+    Column("access_token", String, nullable=False),
+    Column("refresh_token", String, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "community_posts",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("author_name", String, nullable=False),
+    Column("summary", String, nullable=False),
+    Column("content", Text, nullable=False),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "google_calendar_integrations",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("access_token", String, nullable=False),
+    Column("refresh_token", String, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "kanban_columns",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "notifications",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False),
+    Column("body", Text, nullable=False),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "teams",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "users",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, nullable=False, unique=True),
+    Column("full_name", String, nullable=False),
+    Column("role", String, nullable=False),
+    Column("password_hash", String, nullable=False),
+    Column("temp_code", String),
+    Column("contract_expiry", DateTime),
+    Column("is_active", Boolean),
+    Column("token_expiry", DateTime),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "calendar_events",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False),
+    Column("description", Text),
+    Column("start_time", DateTime, nullable=False),
+    Column("end_time", DateTime, nullable=False),
+    Column("all_day", Boolean),
+    Column("created_by_user_id", Integer, ForeignKey("users.id", ondelete="SET NULL")),
+    Column("created_by_company_id", Integer, ForeignKey("companies.id", ondelete="SET NULL")),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "drive_files",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("filename", String, nullable=False),
+    Column("filetype", String, nullable=False),
+    Column("is_folder", Boolean),
+    Column("path", String, nullable=False),
+    Column("size", Integer),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+    Column("uploaded_by_user_id", Integer, ForeignKey("users.id", ondelete="SET NULL")),
+    Column("created_at", DateTime),
+    Column("modified", DateTime),
+)
+
+Table(
+    "groups",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_by_user_id", Integer, ForeignKey("users.id", ondelete="SET NULL")),
+    Column("created_by_company_id", Integer, ForeignKey("companies.id", ondelete="SET NULL")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "kanban_tasks",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("content", String, nullable=False),
+    Column("column_id", Integer, ForeignKey("kanban_columns.id", ondelete="CASCADE")),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "media_assets",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("filename", String, nullable=False),
+    Column("filetype", String, nullable=False),
+    Column("uploaded_by_user_id", Integer, ForeignKey("users.id", ondelete="SET NULL")),
+    Column("uploaded_by_company_id", Integer, ForeignKey("companies.id", ondelete="SET NULL")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "messages",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("content", Text, nullable=False),
+    Column("sender_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("team_id", Integer, ForeignKey("teams.id", ondelete="CASCADE")),
+    Column("timestamp", DateTime),
+)
+
+Table(
+    "projects",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("end_date", DateTime, nullable=False),
+    Column("status", String, nullable=False),
+    Column("company_id", Integer, ForeignKey("companies.id", ondelete="CASCADE")),
+    Column("created_by_user_id", Integer, ForeignKey("users.id", ondelete="SET NULL")),
+    Column("created_by_company_id", Integer, ForeignKey("companies.id", ondelete="SET NULL")),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "tool_permissions",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("tool_id", Integer, ForeignKey("tools.id", ondelete="CASCADE")),
+    Column("access_start", DateTime, nullable=False),
+    Column("access_end", DateTime, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "user_canva_assignments",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("canva_integration_id", Integer, ForeignKey("canva_integrations.id", ondelete="CASCADE")),
+    Column("access_start", DateTime, nullable=False),
+    Column("access_end", DateTime, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "document_permissions",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("document_id", Integer, ForeignKey("drive_files.id", ondelete="CASCADE")),
+    Column("access_start", DateTime, nullable=False),
+    Column("access_end", DateTime, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "group_members",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("group_id", Integer, ForeignKey("groups.id", ondelete="CASCADE")),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+)
+
+Table(
+    "group_messages",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("group_id", Integer, ForeignKey("groups.id", ondelete="CASCADE")),
+    Column("sender_user_id", Integer, ForeignKey("users.id", ondelete="SET NULL")),
+    Column("sender_company_id", Integer, ForeignKey("companies.id", ondelete="SET NULL")),
+    Column("content", Text, nullable=False),
+    Column("timestamp", DateTime),
+)
+
+Table(
+    "project_members",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE")),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("access_start", DateTime, nullable=False),
+    Column("access_end", DateTime, nullable=False),
+    Column("created_at", DateTime),
+)
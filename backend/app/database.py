@@ -1,11 +1,18 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, DateTime, func, Text
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, DateTime, func, Text, JSON, Index, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import declarative_base, relationship, sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.future import select
+from fastapi import Request
 from pydantic import BaseModel, EmailStr
+from dataclasses import dataclass
 from typing import Optional, List, Literal
 from datetime import datetime, timedelta
 import os
+import time
 
 
 # DATABASE CONFIG
@@ -14,9 +21,156 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL not set in environment")
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class DatabaseProfile:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_pre_ping: bool
+    pool_recycle: int
+    statement_cache_size: int
+    echo: bool
+
+    @classmethod
+    def from_env(cls) -> "DatabaseProfile":
+        return cls(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+            echo=_env_bool("DB_ECHO", False),
+        )
+
+    def engine_kwargs(self, url: str) -> dict:
+        kwargs = {
+            "echo": self.echo,
+            "poolclass": InstrumentedAsyncQueuePool,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_pre_ping": self.pool_pre_ping,
+            "pool_recycle": self.pool_recycle,
+        }
+        if make_url(url).get_driver_name() == "asyncpg":
+            kwargs["connect_args"] = {"prepared_statement_cache_size": self.statement_cache_size}
+        return kwargs
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long checkouts wait for a connection.
+
+    ``waiting`` is the number of checkouts currently blocked because every
+    connection is in use and the overflow is exhausted; ``waits`` counts how
+    many checkouts have had to block so far.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.waits = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _must_wait(self) -> bool:
+        return self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+
+    def _do_get(self):
+        blocked = self._must_wait()
+        if blocked:
+            self.waiting += 1
+            self.waits += 1
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            if blocked:
+                self.waiting -= 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        self.checkouts += 1
+        return connection
+
+
+def pool_stats(async_engine: AsyncEngine) -> dict:
+    pool = async_engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        stats.update({
+            "waiting": pool.waiting,
+            "waits": pool.waits,
+            "checkouts": pool.checkouts,
+            "timeouts": pool.timeouts,
+            "wait_avg_ms": round(1000 * pool.wait_total / pool.checkouts, 3) if pool.checkouts else 0.0,
+            "wait_max_ms": round(1000 * pool.wait_max, 3),
+        })
+    return stats
+
+
+db_profile = DatabaseProfile.from_env()
+
+# Optional read replica; GET/HEAD requests read from it when it is set.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
 Base = declarative_base()
-engine = create_async_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+engine = create_async_engine(DATABASE_URL, **db_profile.engine_kwargs(DATABASE_URL))
+read_engine = (
+    create_async_engine(DATABASE_READ_URL, **db_profile.engine_kwargs(DATABASE_READ_URL))
+    if DATABASE_READ_URL else None
+)
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica until it first writes.
+
+    Any statement that is not a plain SELECT (flushes, bulk DML, SELECT ... FOR
+    UPDATE) goes to the primary and pins the session there, so the rest of the
+    request reads its own writes.
+    """
+
+    def __init__(self, *args, use_replica: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_replica = use_replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.use_replica and read_engine is not None:
+            if (
+                not self._flushing
+                and getattr(clause, "is_select", False)
+                and getattr(clause, "_for_update_arg", None) is None
+            ):
+                return read_engine.sync_engine
+            self.use_replica = False
+        return engine.sync_engine
+
+
+SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False)
+
+
+# ----------------------
+# Session dependencies
+# ----------------------
+async def get_db(request: Request):
+    async with SessionLocal(use_replica=request.method in ("GET", "HEAD")) as session:
+        yield session
+
 
 # ------------------------
 # SQLALCHEMY MODELS
@@ -70,6 +224,10 @@ class User(Base):
     tool_permissions = relationship("ToolPermission", back_populates="user", cascade="all, delete-orphan")
     document_permissions = relationship("DocumentPermission", back_populates="user", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_users_company_id", "company_id"),
+    )
+
 
 
 
@@ -82,6 +240,22 @@ class VerificationToken(Base):
     created_at = Column(DateTime, default=func.now())
     expires_at = Column(DateTime, default=lambda: datetime.utcnow() + timedelta(minutes=10))
 
+    __table_args__ = (
+        # One live code per address; issuing a new one upserts this row.
+        Index("ix_verification_tokens_email", "email", unique=True),
+        Index("ix_verification_tokens_email_token_expires_at", "email", "token", "expires_at"),
+        Index("ix_verification_tokens_expires_at", "expires_at"),
+    )
+
+
+class OAuthState(Base):
+    __tablename__ = "oauth_states"
+
+    state = Column(String, primary_key=True)
+    provider = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    expires = Column(DateTime, nullable=False, index=True)
+
 
 class CanvaIntegration(Base):
     __tablename__ = "canva_integrations"
@@ -132,6 +306,10 @@ class Team(Base):
     company = relationship("Company", back_populates="teams")
     messages = relationship("Message", back_populates="team")
 
+    __table_args__ = (
+        Index("ix_teams_company_id", "company_id"),
+    )
+
 
 class Message(Base):
     __tablename__ = "messages"
@@ -140,11 +318,17 @@ class Message(Base):
     content = Column(Text, nullable=False)
     sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"))
-    timestamp = Column(DateTime, default=func.now())
+    # Partition key on PostgreSQL (monthly ranges, see app/services/partitions.py)
+    timestamp = Column(DateTime, default=func.now(), nullable=False)
 
     sender = relationship("User", back_populates="messages")
     team = relationship("Team", back_populates="messages")
 
+    __table_args__ = (
+        Index("ix_messages_team_id_timestamp", "team_id", "timestamp"),
+        Index("ix_messages_team_id_id", "team_id", "id"),
+    )
+
 
 class Notification(Base):
     __tablename__ = "notifications"
@@ -187,6 +371,10 @@ class CalendarEvent(Base):
     company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"))
     created_at = Column(DateTime, default=func.now())
 
+    __table_args__ = (
+        Index("ix_calendar_events_company_id_start_time", "company_id", "start_time"),
+    )
+
 
 # SQLAlchemy model for uploaded media assets
 class MediaAsset(Base):
@@ -209,6 +397,10 @@ class KanbanTask(Base):
     company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"))
     created_at = Column(DateTime, default=func.now())
 
+    __table_args__ = (
+        Index("ix_kanban_tasks_column_id", "column_id"),
+    )
+
 
 class KanbanColumn(Base):
     __tablename__ = "kanban_columns"
@@ -220,6 +412,10 @@ class KanbanColumn(Base):
 
     tasks = relationship("KanbanTask", backref="column", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_kanban_columns_company_id", "company_id"),
+    )
+
 
 class DriveFile(Base):
     __tablename__ = "drive_files"
@@ -240,6 +436,10 @@ class DriveFile(Base):
     uploaded_by_user = relationship("User", back_populates="uploaded_files", foreign_keys=[uploaded_by_user_id])
     document_permissions = relationship("DocumentPermission", back_populates="document", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_drive_files_company_id", "company_id"),
+    )
+
 
 
 class DocumentPermission(Base):
@@ -255,6 +455,11 @@ class DocumentPermission(Base):
     user = relationship("User", back_populates="document_permissions")
     document = relationship("DriveFile", back_populates="document_permissions")
 
+    __table_args__ = (
+        Index("ix_document_permissions_user_id_document_id", "user_id", "document_id"),
+        Index("ix_document_permissions_document_id", "document_id"),
+    )
+
 
 
 class Project(Base):
@@ -276,6 +481,10 @@ class Project(Base):
     created_by_company = relationship("Company", foreign_keys=[created_by_company_id])
     members = relationship("ProjectMember", back_populates="project", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_projects_company_id", "company_id"),
+    )
+
 
 class ProjectMember(Base):
     __tablename__ = "project_members"
@@ -290,6 +499,11 @@ class ProjectMember(Base):
     project = relationship("Project", back_populates="members")
     user = relationship("User", back_populates="project_memberships")
 
+    __table_args__ = (
+        Index("ix_project_members_user_id", "user_id"),
+        Index("ix_project_members_project_id", "project_id"),
+    )
+
 
 
 
@@ -305,6 +519,10 @@ class Group(Base):
 
     members = relationship("GroupMember", back_populates="group", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_groups_company_id", "company_id"),
+    )
+
 
 class GroupMember(Base):
     __tablename__ = "group_members"
@@ -315,6 +533,11 @@ class GroupMember(Base):
     group = relationship("Group", back_populates="members")
     user = relationship("User", back_populates="group_memberships")
 
+    __table_args__ = (
+        Index("ix_group_members_user_id", "user_id"),
+        Index("ix_group_members_group_id", "group_id"),
+    )
+
 
 
 class GroupMessage(Base):
@@ -324,11 +547,31 @@ class GroupMessage(Base):
     sender_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     sender_company_id = Column(Integer, ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=func.now())
+    # Partition key on PostgreSQL (monthly ranges, see app/services/partitions.py)
+    timestamp = Column(DateTime, default=func.now(), nullable=False)
 
     sender_user = relationship("User", foreign_keys=[sender_user_id])
     sender_company = relationship("Company", foreign_keys=[sender_company_id])
 
+    __table_args__ = (
+        Index("ix_group_messages_group_id_timestamp", "group_id", "timestamp"),
+        Index("ix_group_messages_group_id_id", "group_id", "id"),
+    )
+
+
+class GroupReadMarker(Base):
+    """How far a member has read a group, and how many messages from others are newer."""
+    __tablename__ = "group_read_markers"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    last_read_message_id = Column(Integer, nullable=False, default=0)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_group_read_markers_group_id", "group_id"),
+    )
+
 
 class Tool(Base):
     __tablename__ = "tools"
@@ -343,6 +586,10 @@ class Tool(Base):
     permissions = relationship("ToolPermission", back_populates="tool", cascade="all, delete-orphan")
 
 
+# Backs the case-insensitive de-duplication of the tool catalog
+Index("ix_tools_lower_title_id", func.lower(Tool.title), Tool.id)
+
+
 class ToolPermission(Base):
     __tablename__ = "tool_permissions"
 
@@ -356,8 +603,21 @@ class ToolPermission(Base):
     user = relationship("User", back_populates="tool_permissions")
     tool = relationship("Tool", back_populates="permissions")
 
+    __table_args__ = (
+        Index("ix_tool_permissions_user_id_tool_id", "user_id", "tool_id"),
+        Index("ix_tool_permissions_tool_id", "tool_id"),
+    )
 
 
+# Full-text search: on PostgreSQL, group_messages, messages, drive_files and
+# community_posts carry a generated, GIN-indexed ``search_vector`` column
+# (migration 6). It is left unmapped so the models stay portable.
+SEARCH_TEXT_CONFIG = "simple"
+
+
+def search_vector(model):
+    return literal_column(f"{model.__tablename__}.search_vector", TSVECTOR)
+
 
 # ------------------------
 # PYDANTIC SCHEMAS
@@ -401,7 +661,13 @@ class UserOut(BaseModel):
     tools: List[AssignmentOut] = []
     projects: List[AssignmentOut] = []
     documents: List[AssignmentOut] = []
- 
+
+
+# Row shape for the bulk list projections. Addresses were validated as
+# EmailStr when written; re-checking every stored one dominated list serialization.
+class UserListOut(UserOut):
+    email: str
+
 
 class VerificationTokenCreate(BaseModel):
     email: EmailStr
@@ -528,6 +794,10 @@ class CopilotRequest(BaseModel):
 class CopilotResponse(BaseModel):
     response: str
 
+# Pydantic schema for batch generation
+class CopilotBatchRequest(BaseModel):
+    prompts: List[str]
+
 
 # Pydantic schema for media asset output
 class MediaAssetOut(BaseModel):
@@ -580,6 +850,10 @@ class KanbanColumnOut(BaseModel):
         from_attributes = True
 
 
+class KanbanColumnWithTasksOut(KanbanColumnOut):
+    tasks: List[KanbanTaskOut] = []
+
+
 class DriveFileCreate(BaseModel):
     filename: str
     filetype: str
@@ -628,6 +902,9 @@ class ProjectOut(BaseModel):
     class Config:
         from_attributes = True
 
+class ProjectListOut(ProjectOut):
+    members: list[UserListOut]
+
 class ProjectMemberOut(BaseModel):
     id: int
     project_id: int
@@ -673,6 +950,18 @@ class GroupMessageCreate(BaseModel):
     sender_user_id: Optional[int] = None
     sender_company_id: Optional[int] = None
 
+class GroupReadUpdate(BaseModel):
+    user_id: int
+    last_read_message_id: Optional[int] = None  # defaults to the newest message
+
+
+class GroupUnreadOut(BaseModel):
+    group_id: int
+    name: str
+    unread_count: int
+    last_read_message_id: Optional[int] = None
+
+
 class GroupMessageOut(BaseModel):
     id: int
     group_id: int
@@ -769,3 +1058,15 @@ class EditUserRequest(BaseModel):
     projects: List[TimedAssignment]
     documents: List[TimedAssignment]
     groups: List[str]
+
+
+SearchKind = Literal["group_message", "message", "file", "post"]
+
+class SearchHitOut(BaseModel):
+    kind: SearchKind
+    id: int
+    rank: float
+    title: Optional[str] = None
+    snippet: Optional[str] = None
+    parent_id: Optional[int] = None  # group id or team id for chat messages
+    created_at: Optional[datetime] = None
@@ -2,8 +2,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.database import Base, engine
-from app.routers import auth, company, team, messages, copilot, canva, google, calendar, media, trello, drive, projects, users, groups, tools, adduser
+from app.database import engine
+from app.migrations import check_schema_version
+from app.routers import auth, company, team, messages, copilot, canva, google, calendar, media, trello, drive, projects, users, groups, tools, adduser, search, internal
+from app.services.passwords import password_hasher
+from app.services.mailer import mail_dispatcher
+from app.services.http_client import http_clients
+from app.services.verification import token_purger
+from app.services.partitions import partition_maintenance
+from app.services.pagination import NEXT_CURSOR_HEADER
 
 app = FastAPI(title="BrandGenie Pro Backend")
 
@@ -13,6 +20,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Serve uploaded files
@@ -20,8 +28,24 @@ app.mount("/media", StaticFiles(directory="uploaded_media"), name="media")
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await check_schema_version(engine)
+    mail_dispatcher.start()
+    http_clients.start()
+    token_purger.start()
+    if engine.dialect.name == "postgresql":
+        partition_maintenance.start()
+    groups.group_hub.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await groups.group_message_batcher.stop()
+    await messages.message_batcher.stop()
+    await groups.group_hub.stop()
+    await partition_maintenance.stop()
+    await token_purger.stop()
+    await mail_dispatcher.stop()
+    await http_clients.aclose()
+    password_hasher.shutdown()
 
 # Include all routers
 app.include_router(auth.router, prefix="/api")
@@ -40,3 +64,5 @@ app.include_router(users.router)
 app.include_router(groups.router)
 app.include_router(tools.router)
 app.include_router(adduser.router)
+app.include_router(search.router)
+app.include_router(internal.router)
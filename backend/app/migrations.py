@@ -0,0 +1,420 @@
+# app/migrations.py
+"""Versioned schema migrations.
+
+Migrations run once each, in order, and every applied version is recorded in
+``schema_migrations``. Apply them with ``python -m app.scripts.migrate`` before
+the app starts; startup itself only checks the recorded version.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable
+import logging
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, func, insert, inspect, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.schema import CreateIndex
+
+from app.baseline_schema import baseline
+from app.database import Base, SEARCH_TEXT_CONFIG, GroupMember, GroupMessage
+from app.services.partitions import (
+    PARTITION_MONTHS_AHEAD,
+    add_months,
+    child_tables,
+    ensure_partitions,
+    legacy_partition_name,
+    month_start,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_lock so only one migrate process runs at a time.
+MIGRATION_LOCK_KEY = 0x42470001
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[AsyncConnection], Awaitable[None]]
+    # Non-transactional migrations run in autocommit mode, which
+    # CREATE INDEX CONCURRENTLY requires.
+    transactional: bool = True
+
+
+# ----------------------
+# Helpers
+# ----------------------
+def find_index(name: str) -> Index:
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(f"Index {name} is not declared on any model")
+
+
+async def drop_invalid_index(conn: AsyncConnection, name: str):
+    result = await conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ),
+        {"name": name},
+    )
+    if result.scalar_one_or_none() is False:
+        logger.warning("Dropping invalid index %s before rebuilding it", name)
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+
+async def create_indexes_concurrently(conn: AsyncConnection, names: Iterable[str]):
+    """Build the named model indexes without blocking writes on PostgreSQL.
+
+    A CONCURRENTLY build that was interrupted leaves an INVALID index behind,
+    which IF NOT EXISTS would then skip, so those are dropped and rebuilt.
+    """
+    postgres = conn.dialect.name == "postgresql"
+    for name in names:
+        index = find_index(name)
+        if postgres:
+            await drop_invalid_index(conn, name)
+
+        ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+        if postgres:
+            ddl = ddl.replace("INDEX", "INDEX CONCURRENTLY", 1)
+        logger.info("Creating index %s", name)
+        await conn.execute(text(ddl))
+
+
+# ----------------------
+# Migrations
+# ----------------------
+async def _baseline(conn: AsyncConnection):
+    # Creates whatever tables are missing; databases that were previously
+    # bootstrapped by create_all at startup keep their existing tables.
+    await conn.run_sync(baseline.create_all)
+
+
+async def _foreign_key_indexes(conn: AsyncConnection):
+    await create_indexes_concurrently(conn, [
+        "ix_users_company_id",
+        "ix_teams_company_id",
+        "ix_messages_team_id_timestamp",
+        "ix_calendar_events_company_id_start_time",
+        "ix_kanban_columns_company_id",
+        "ix_kanban_tasks_column_id",
+        "ix_drive_files_company_id",
+        "ix_document_permissions_user_id_document_id",
+        "ix_document_permissions_document_id",
+        "ix_projects_company_id",
+        "ix_project_members_user_id",
+        "ix_project_members_project_id",
+        "ix_groups_company_id",
+        "ix_group_members_user_id",
+        "ix_group_members_group_id",
+        "ix_group_messages_group_id_timestamp",
+        "ix_tool_permissions_user_id_tool_id",
+        "ix_tool_permissions_tool_id",
+        "ix_verification_tokens_email_token_expires_at",
+        "ix_verification_tokens_expires_at",
+    ])
+
+
+async def _tool_title_index(conn: AsyncConnection):
+    await create_indexes_concurrently(conn, ["ix_tools_lower_title_id"])
+
+
+async def _message_sync_indexes(conn: AsyncConnection):
+    await create_indexes_concurrently(conn, ["ix_messages_team_id_id", "ix_group_messages_group_id_id"])
+
+
+# Definitions of the partitioned message tables as of migration 5. The primary
+# key has to include the partition key, so it becomes (id, timestamp); ids
+# still come from the original sequence and stay unique.
+PARTITIONED_MESSAGE_TABLES = {
+    "group_messages": (
+        """
+        id INTEGER NOT NULL DEFAULT nextval('{sequence}'::regclass),
+        group_id INTEGER REFERENCES groups (id) ON DELETE CASCADE,
+        sender_user_id INTEGER REFERENCES users (id) ON DELETE SET NULL,
+        sender_company_id INTEGER REFERENCES companies (id) ON DELETE SET NULL,
+        content TEXT NOT NULL,
+        "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now()
+        """,
+        ["ix_group_messages_id", "ix_group_messages_group_id_timestamp", "ix_group_messages_group_id_id"],
+    ),
+    "messages": (
+        """
+        id INTEGER NOT NULL DEFAULT nextval('{sequence}'::regclass),
+        content TEXT NOT NULL,
+        sender_id INTEGER REFERENCES users (id) ON DELETE CASCADE,
+        team_id INTEGER REFERENCES teams (id) ON DELETE CASCADE,
+        "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now()
+        """,
+        ["ix_messages_id", "ix_messages_team_id_timestamp", "ix_messages_team_id_id"],
+    ),
+}
+
+PARTITION_BACKFILL_BATCH_SIZE = 5000
+# How long the final swap waits for its lock before giving up, so it never
+# queues behind a long query while blocking everything queued behind it.
+PARTITION_SWAP_LOCK_TIMEOUT = "5s"
+
+
+async def _is_partitioned(conn: AsyncConnection, table: str) -> bool:
+    result = await conn.execute(text("SELECT relkind FROM pg_class WHERE relname = :table"), {"table": table})
+    return result.scalar_one_or_none() == "p"
+
+
+async def _partition_message_tables(conn: AsyncConnection):
+    """Partition the message tables without copying them.
+
+    The existing table becomes the ``<table>_legacy`` partition of a new
+    partitioned parent. Everything slow (the NULL backfill, validating the
+    bound, building the unique index) runs before the swap under locks that
+    don't block reads or writes, and each step can be re-run. The swap itself
+    only renames and attaches, in one short transaction.
+    """
+    if conn.dialect.name != "postgresql":
+        logger.info("Skipping message table partitioning on %s", conn.dialect.name)
+        return
+
+    # The legacy partition ends two months out, so rows written while this
+    # migration runs always fit it even across a month boundary.
+    cutoff = add_months(month_start(datetime.utcnow()), 2)
+    for table, (columns, index_names) in PARTITIONED_MESSAGE_TABLES.items():
+        if await _is_partitioned(conn, table):
+            continue
+        legacy = legacy_partition_name(table)
+        staging = f"{table}_partitioned"
+        bound = f"{legacy}_bound"
+        unique = f"{legacy}_id_timestamp_key"
+
+        # NOT VALID is enforced for new rows at once but skips the scan.
+        await conn.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN "timestamp" SET DEFAULT now()'))
+        await conn.execute(text(f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "{bound}"'))
+        await conn.execute(text(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{bound}" '
+            f"""CHECK ("timestamp" IS NOT NULL AND "timestamp" < '{cutoff:%Y-%m-%d}') NOT VALID"""
+        ))
+        while True:
+            result = await conn.execute(text(
+                f'UPDATE "{table}" SET "timestamp" = now() WHERE id IN '
+                f'(SELECT id FROM "{table}" WHERE "timestamp" IS NULL LIMIT {PARTITION_BACKFILL_BATCH_SIZE})'
+            ))
+            if result.rowcount == 0:
+                break
+        # VALIDATE only takes SHARE UPDATE EXCLUSIVE. Once it holds, SET NOT
+        # NULL and ATTACH PARTITION both trust it instead of scanning.
+        await conn.execute(text(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{bound}"'))
+        await conn.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN "timestamp" SET NOT NULL'))
+
+        # The parent's primary key needs a matching unique index on the
+        # partition, or attaching it would build one under lock.
+        await drop_invalid_index(conn, unique)
+        await conn.execute(text(
+            f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "{unique}" ON "{table}" (id, "timestamp")'
+        ))
+
+        sequence = (await conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table})).scalar_one()
+        await conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{staging}" ({columns.format(sequence=sequence)}) PARTITION BY RANGE ("timestamp")'
+        ))
+
+        # This connection is in autocommit mode, so the swap takes its own.
+        async with conn.engine.begin() as swap:
+            await swap.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_SWAP_LOCK_TIMEOUT}'"))
+            await swap.execute(text(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE'))
+            # Free the model's index names for the parent; the attach below
+            # adopts these indexes as the partition's copies.
+            for name in index_names:
+                await swap.execute(text(f'ALTER INDEX "{name}" RENAME TO "{name}_legacy"'))
+            await swap.execute(text(f'ALTER INDEX "{table}_pkey" RENAME TO "{legacy}_pkey"'))
+            await swap.execute(text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+            await swap.execute(text(f'ALTER TABLE "{legacy}" ADD CONSTRAINT "{unique}" UNIQUE USING INDEX "{unique}"'))
+            await swap.execute(text(f'ALTER TABLE "{staging}" RENAME TO "{table}"'))
+
+            await swap.execute(text(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, "timestamp")'))
+            for name in index_names:
+                await swap.execute(CreateIndex(find_index(name)))
+            await swap.execute(text(
+                f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" '
+                f"FOR VALUES FROM (MINVALUE) TO ('{cutoff:%Y-%m-%d}')"
+            ))
+            await ensure_partitions(swap, table, cutoff, add_months(month_start(datetime.utcnow()), PARTITION_MONTHS_AHEAD))
+            await swap.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{table}".id'))
+        logger.info("Partitioned %s by month from %s", table, cutoff.strftime("%Y-%m"))
+
+
+# Text each table's search_vector is generated from. Path separators and
+# underscores become spaces so file names and folders match word by word.
+SEARCH_DOCUMENTS = {
+    "group_messages": "coalesce(content, '')",
+    "messages": "coalesce(content, '')",
+    "drive_files": "translate(coalesce(filename, '') || ' ' || coalesce(path, ''), '/_.-', '    ')",
+    "community_posts": "coalesce(summary, '') || ' ' || coalesce(content, '') || ' ' || coalesce(author_name, '')",
+}
+
+
+async def _search_vectors(conn: AsyncConnection):
+    if conn.dialect.name != "postgresql":
+        logger.info("Skipping full-text search columns on %s", conn.dialect.name)
+        return
+
+    for table, document in SEARCH_DOCUMENTS.items():
+        logger.info("Adding search_vector to %s", table)
+        await conn.execute(text(
+            f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS search_vector tsvector '
+            f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_TEXT_CONFIG}', {document})) STORED"
+        ))
+
+    for table in SEARCH_DOCUMENTS:
+        name = f"ix_{table}_search_vector"
+        partitions = await child_tables(conn, table)
+        if not partitions:
+            await drop_invalid_index(conn, name)
+            await conn.execute(text(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" USING gin (search_vector)'
+            ))
+            continue
+
+        # Partitioned parents can't be indexed concurrently: create the parent
+        # index empty, build each partition's concurrently, then attach them.
+        # Partitions created later get the index automatically.
+        await conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON ONLY "{table}" USING gin (search_vector)'))
+        for partition in partitions:
+            child = f"{partition}_search_vector_idx"
+            await drop_invalid_index(conn, child)
+            await conn.execute(text(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{child}" ON "{partition}" USING gin (search_vector)'
+            ))
+            await conn.execute(text(f'ALTER INDEX "{name}" ATTACH PARTITION "{child}"'))
+
+
+# group_read_markers as migration 7 created it. Its foreign keys point at the
+# baseline tables, which this table's own metadata doesn't contain.
+group_read_markers = Table(
+    "group_read_markers",
+    MetaData(),
+    Column("user_id", Integer, ForeignKey(baseline.tables["users"].c.id, ondelete="CASCADE"), primary_key=True),
+    Column("group_id", Integer, ForeignKey(baseline.tables["groups"].c.id, ondelete="CASCADE"), primary_key=True),
+    Column("last_read_message_id", Integer, nullable=False),
+    Column("unread_count", Integer, nullable=False),
+    Column("updated_at", DateTime),
+    Index("ix_group_read_markers_group_id", "group_id"),
+)
+
+
+async def _group_read_markers(conn: AsyncConnection):
+    await conn.run_sync(group_read_markers.create, checkfirst=True)
+    # Existing members start with everything up to now marked as read.
+    newest = (
+        select(func.coalesce(func.max(GroupMessage.id), 0))
+        .where(GroupMessage.group_id == GroupMember.group_id)
+        .scalar_subquery()
+    )
+    members = (
+        select(GroupMember.user_id, GroupMember.group_id, newest, literal(0), func.now())
+        .where(GroupMember.user_id.isnot(None), GroupMember.group_id.isnot(None))
+        .where(~select(group_read_markers.c.user_id).where(
+            group_read_markers.c.user_id == GroupMember.user_id,
+            group_read_markers.c.group_id == GroupMember.group_id,
+        ).exists())
+        .distinct()
+    )
+    await conn.execute(insert(group_read_markers).from_select(
+        ["user_id", "group_id", "last_read_message_id", "unread_count", "updated_at"], members,
+    ))
+
+
+async def _unique_verification_email(conn: AsyncConnection):
+    # Keep only the newest code per address before the index can be unique.
+    # If an older app version inserts a duplicate meanwhile, the build fails
+    # and a re-run starts over from here.
+    await conn.execute(text(
+        "DELETE FROM verification_tokens WHERE id NOT IN "
+        "(SELECT max(id) FROM verification_tokens GROUP BY email)"
+    ))
+    await create_indexes_concurrently(conn, ["ix_verification_tokens_email"])
+
+
+MIGRATIONS = [
+    Migration(1, "Baseline schema", _baseline),
+    Migration(2, "Indexes for foreign-key filters used by the routers", _foreign_key_indexes, transactional=False),
+    Migration(3, "Expression index for the de-duplicated tool catalog", _tool_title_index, transactional=False),
+    Migration(4, "Indexes for since_id message sync", _message_sync_indexes, transactional=False),
+    Migration(5, "Partition group_messages and messages by month", _partition_message_tables, transactional=False),
+    Migration(6, "Full-text search columns and GIN indexes", _search_vectors, transactional=False),
+    Migration(7, "Per-member read markers and unread counters for groups", _group_read_markers),
+    Migration(8, "One verification code per email", _unique_verification_email, transactional=False),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+# ----------------------
+# Runner
+# ----------------------
+async def current_version(conn: AsyncConnection) -> int:
+    if not await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(schema_migrations.name)):
+        return 0
+    result = await conn.execute(select(func.max(schema_migrations.c.version)))
+    return result.scalar() or 0
+
+
+async def run_migrations(engine: AsyncEngine) -> list[int]:
+    """Apply every pending migration in order and return the versions applied."""
+    applied = []
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        postgres = lock_conn.dialect.name == "postgresql"
+        if postgres:
+            await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(schema_migrations.create, checkfirst=True)
+                version = await current_version(conn)
+
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                logger.info("Applying migration %s: %s", migration.version, migration.description)
+                if migration.transactional:
+                    async with engine.begin() as conn:
+                        await migration.upgrade(conn)
+                        await _record(conn, migration)
+                else:
+                    async with engine.connect() as conn:
+                        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                        await migration.upgrade(conn)
+                        await _record(conn, migration)
+                applied.append(migration.version)
+        finally:
+            if postgres:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    return applied
+
+
+async def _record(conn: AsyncConnection, migration: Migration):
+    await conn.execute(schema_migrations.insert().values(
+        version=migration.version,
+        description=migration.description,
+        applied_at=datetime.utcnow(),
+    ))
+
+
+async def check_schema_version(engine: AsyncEngine):
+    async with engine.connect() as conn:
+        version = await current_version(conn)
+    if version < SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version} but the app needs {SCHEMA_VERSION}; "
+            "run `python -m app.scripts.migrate` first."
+        )
@@ -1,19 +1,21 @@
+import csv
+import io
 import os
 import random
-import smtplib
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
-from typing import List
+from typing import List, Optional, Union
 
 import pytz
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from pydantic import BaseModel, EmailStr, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from passlib.context import CryptContext
 
 from app.database import (
-    SessionLocal,
+    get_db,
     User,
     ProjectMember,
     ToolPermission,
@@ -21,19 +23,19 @@ from app.database import (
     DriveFile,
     Tool,
     Project,
+    Group,
     GroupMember,
 )
+from app.services.passwords import hash_password, hash_passwords
+from app.services.principals import invalidate_user
+from app.services.mailer import mail_dispatcher
 
 
 router = APIRouter(prefix="/api/adduser", tags=["Add User"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 BERLIN_TZ = pytz.timezone("Europe/Berlin")
-
-# ---------- DB Dependency ----------
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
+MAX_BULK_USERS = int(os.getenv("MAX_BULK_USERS", "1000"))
+CSV_LIST_SEPARATOR = ";"
 
 # ---------- Request Models ----------
 class DurationModel(BaseModel):
@@ -69,9 +71,7 @@ def send_email(to_email: str, code: str, duration: str):
     msg["From"] = from_email
     msg["To"] = to_email
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(from_email, email_password)
-        server.send_message(msg)
+    mail_dispatcher.enqueue(msg)
 
 # ---------- Helper ----------
 def calculate_expiry(duration_value: int, duration_type: str) -> datetime:
@@ -104,7 +104,7 @@ async def add_user(payload: AddUserPayload, db: AsyncSession = Depends(get_db)):
     temp_code = "".join([str(random.randint(0, 9)) for _ in range(5)])
     contract_expiry = calculate_expiry(payload.durationValue, payload.durationType)
 
-    hashed_code = pwd_context.hash(temp_code)
+    hashed_code = await hash_password(temp_code)
 
     user = User(
         full_name=payload.fullName,
@@ -152,7 +152,204 @@ async def add_user(payload: AddUserPayload, db: AsyncSession = Depends(get_db)):
         ))
 
     await db.commit()
+    invalidate_user(user.id)
 
     send_email(user.email, temp_code, f"{payload.durationValue} {payload.durationType}")
 
-    return {"message": "User created and login email sent."}
+    return {"message": "User created and login email queued."}
+
+
+# ---------- Bulk Onboarding ----------
+def _generate_temp_code() -> str:
+    return "".join([str(random.randint(0, 9)) for _ in range(5)])
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+
+def _csv_row_to_payload(row: dict, company_id: Optional[int]) -> AddUserPayload:
+    def ids(column: str) -> List[str]:
+        return [v.strip() for v in (row.get(column) or "").split(CSV_LIST_SEPARATOR) if v.strip()]
+
+    def duration(prefix: str) -> dict:
+        return {
+            "items": ids(prefix),
+            "durationValue": row.get(f"{prefix}DurationValue") or row.get("durationValue"),
+            "durationType": row.get(f"{prefix}DurationType") or row.get("durationType"),
+        }
+
+    return AddUserPayload(
+        fullName=row.get("fullName"),
+        email=row.get("email"),
+        role=row.get("role"),
+        durationValue=row.get("durationValue"),
+        durationType=row.get("durationType"),
+        groups=ids("groups"),
+        projects=duration("projects"),
+        tools=duration("tools"),
+        documents=duration("documents"),
+        company_id=row.get("company_id") or company_id,
+    )
+
+
+async def _existing_ids(db: AsyncSession, id_column, wanted: set) -> set:
+    if not wanted:
+        return set()
+    result = await db.execute(select(id_column).where(id_column.in_(wanted)))
+    return set(result.scalars().all())
+
+
+async def bulk_add_users(rows: List[Union[AddUserPayload, str]], db: AsyncSession) -> dict:
+    """Create many users in one transaction.
+
+    ``rows`` holds either a parsed payload or the parse error for that row, so
+    results line up with the caller's input order.
+    """
+    if len(rows) > MAX_BULK_USERS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_USERS} users per request.")
+
+    results = [{"row": i, "status": "error", "detail": row} if isinstance(row, str) else None
+               for i, row in enumerate(rows)]
+
+    # Per-row validation that needs no database access
+    candidates = []
+    seen_emails = set()
+    for i, payload in enumerate(rows):
+        if isinstance(payload, str):
+            continue
+        email = payload.email.strip().lower()
+        if email in seen_emails:
+            results[i] = {"row": i, "email": email, "status": "error", "detail": "Duplicate email in request."}
+            continue
+        seen_emails.add(email)
+        try:
+            expiries = {
+                "contract": calculate_expiry(payload.durationValue, payload.durationType),
+                "projects": calculate_expiry(payload.projects.durationValue, payload.projects.durationType),
+                "tools": calculate_expiry(payload.tools.durationValue, payload.tools.durationType),
+                "documents": calculate_expiry(payload.documents.durationValue, payload.documents.durationType),
+            }
+        except ValueError as e:
+            results[i] = {"row": i, "email": email, "status": "error", "detail": str(e)}
+            continue
+        candidates.append((i, payload, email, expiries))
+
+    # One IN query for duplicates and one per referenced entity type
+    existing_emails = set()
+    if candidates:
+        existing = await db.execute(select(User.email).where(User.email.in_([c[2] for c in candidates])))
+        existing_emails = set(existing.scalars().all())
+
+    known = {
+        "groups": await _existing_ids(db, Group.id, {g for c in candidates for g in c[1].groups}),
+        "projects": await _existing_ids(db, Project.id, {p for c in candidates for p in c[1].projects.items}),
+        "tools": await _existing_ids(db, Tool.id, {t for c in candidates for t in c[1].tools.items}),
+        "documents": await _existing_ids(db, DriveFile.id, {d for c in candidates for d in c[1].documents.items}),
+    }
+
+    accepted = []
+    for i, payload, email, expiries in candidates:
+        if email in existing_emails:
+            results[i] = {"row": i, "email": email, "status": "error", "detail": "User with this email already exists."}
+            continue
+        requested = {
+            "groups": payload.groups,
+            "projects": payload.projects.items,
+            "tools": payload.tools.items,
+            "documents": payload.documents.items,
+        }
+        unknown = {kind: sorted(set(ids) - known[kind]) for kind, ids in requested.items()}
+        unknown = {kind: ids for kind, ids in unknown.items() if ids}
+        if unknown:
+            detail = ", ".join(f"unknown {kind}: {ids}" for kind, ids in unknown.items())
+            results[i] = {"row": i, "email": email, "status": "error", "detail": detail}
+            continue
+        accepted.append((i, payload, email, expiries))
+
+    if accepted:
+        temp_codes = [_generate_temp_code() for _ in accepted]
+        hashed_codes = await hash_passwords(temp_codes)
+
+        user_rows = [{
+            "full_name": payload.fullName,
+            "email": email,
+            "role": payload.role,
+            "password_hash": hashed,
+            "temp_code": code,
+            "contract_expiry": expiries["contract"],
+            "token_expiry": expiries["contract"],
+            "company_id": payload.company_id,
+            "is_active": True,
+        } for (_, payload, email, expiries), code, hashed in zip(accepted, temp_codes, hashed_codes)]
+
+        try:
+            inserted = await db.execute(
+                insert(User).returning(User.id, sort_by_parameter_order=True), user_rows
+            )
+            user_ids = inserted.scalars().all()
+
+            now = datetime.now(BERLIN_TZ).astimezone(pytz.utc).replace(tzinfo=None)
+            group_rows, project_rows, tool_rows, document_rows = [], [], [], []
+            for user_id, (_, payload, _, expiries) in zip(user_ids, accepted):
+                group_rows += [{"user_id": user_id, "group_id": gid} for gid in payload.groups]
+                project_rows += [{"user_id": user_id, "project_id": pid, "access_start": now,
+                                  "access_end": expiries["projects"]} for pid in payload.projects.items]
+                tool_rows += [{"user_id": user_id, "tool_id": tid, "access_start": now,
+                               "access_end": expiries["tools"]} for tid in payload.tools.items]
+                document_rows += [{"user_id": user_id, "document_id": did, "access_start": now,
+                                   "access_end": expiries["documents"]} for did in payload.documents.items]
+
+            for model, grant_rows in (
+                (GroupMember, group_rows),
+                (ProjectMember, project_rows),
+                (ToolPermission, tool_rows),
+                (DocumentPermission, document_rows),
+            ):
+                if grant_rows:
+                    await db.execute(insert(model), grant_rows)
+
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Users changed while importing, please retry.")
+
+        for user_id, code, (i, payload, email, _) in zip(user_ids, temp_codes, accepted):
+            invalidate_user(user_id)
+            result = {"row": i, "email": email, "status": "created", "user_id": user_id, "email_queued": True}
+            try:
+                send_email(email, code, f"{payload.durationValue} {payload.durationType}")
+            except (HTTPException, RuntimeError):
+                result["email_queued"] = False
+            results[i] = result
+
+    created = sum(1 for r in results if r["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+@router.post("/bulk")
+async def add_users_bulk(payload: List[AddUserPayload], db: AsyncSession = Depends(get_db)):
+    return await bulk_add_users(payload, db)
+
+
+@router.post("/bulk/csv")
+async def add_users_bulk_csv(
+    file: UploadFile = File(...),
+    company_id: Optional[int] = Form(None),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV file must be UTF-8 encoded.")
+
+    rows = []
+    for row in csv.DictReader(io.StringIO(text)):
+        try:
+            rows.append(_csv_row_to_payload(row, company_id))
+        except ValidationError as e:
+            rows.append(_format_validation_error(e))
+
+    return await bulk_add_users(rows, db)
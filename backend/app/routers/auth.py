@@ -4,15 +4,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+from typing import Tuple
 from email.message import EmailMessage
-import smtplib
 import os
 
 from app.database import (
-    SessionLocal, User, Company, CompanyCreate, UserOut,
-    VerificationToken, LoginRequest, StaffLoginRequest
+    get_db, User, Company, CompanyCreate, UserOut,
+    LoginRequest, StaffLoginRequest
 )
-from passlib.context import CryptContext
+from app.services.passwords import hash_password, verify_password
+from app.services.principals import (
+    get_cached_user, cache_user, get_cached_company, cache_company, invalidate_company
+)
+from app.services.mailer import mail_dispatcher
+from app.services.kanban import provision_default_board
+from app.services.verification import issue_code, consume_code, VERIFICATION_CODE_TTL_MINUTES
 
 
 
@@ -22,36 +28,21 @@ router = APIRouter()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 FROM_EMAIL = os.getenv("FROM_EMAIL")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 FROM_NAME = os.getenv("FROM_NAME", "BrandGenie Pro")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 # -----------------------
 # Utility Functions
 # -----------------------
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 async def send_verification_email(email: str, code: str):
-    try:
-        msg = EmailMessage()
-        msg["Subject"] = "Verify your BrandGenie Pro Account"
-        msg["From"] = f"{FROM_NAME} <{FROM_EMAIL}>"
-        msg["To"] = email
-        msg.set_content(f"Your verification code is: {code}\nIt expires in 10 minutes.")
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-            smtp.login(FROM_EMAIL, EMAIL_PASSWORD)
-            smtp.send_message(msg)
-    except Exception as e:
-        print("❌ Email failed:", e)
-        raise HTTPException(status_code=500, detail="Failed to send verification email.")
+    msg = EmailMessage()
+    msg["Subject"] = "Verify your BrandGenie Pro Account"
+    msg["From"] = f"{FROM_NAME} <{FROM_EMAIL}>"
+    msg["To"] = email
+    msg.set_content(f"Your verification code is: {code}\nIt expires in {VERIFICATION_CODE_TTL_MINUTES} minutes.")
+    mail_dispatcher.enqueue(msg)
 
 
 # -----------------------
@@ -67,11 +58,13 @@ async def register_company(data: CompanyCreate, db: AsyncSession = Depends(get_d
         company_name=data.company_name,
         email=normalized_email,
         owner_full_name=data.owner_full_name,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password(data.password),
     )
     db.add(company)
+    await db.flush()
+    await provision_default_board(db, company.id)
     await db.commit()
-    await db.refresh(company)
+    invalidate_company(company.id)
     return {"message": "Company registered", "company_id": company.id}
 
 
@@ -80,31 +73,15 @@ async def register_company(data: CompanyCreate, db: AsyncSession = Depends(get_d
 # -----------------------
 @router.post("/send-verification-code")
 async def send_code(email: str = Query(...), db: AsyncSession = Depends(get_db)):
-    code = str(datetime.utcnow().timestamp()).split('.')[-1][:6]
-    token = VerificationToken(
-        email=email.strip().lower(),
-        token=code,
-        expires_at=datetime.utcnow() + timedelta(minutes=10)
-    )
-    db.add(token)
-    await db.commit()
-    await send_verification_email(email, code)
+    await issue_code(db, email.strip().lower(), lambda code: send_verification_email(email, code))
     return {"message": "Verification code sent."}
 
 
 @router.get("/verify-email")
 async def verify_email(email: str, code: str, db: AsyncSession = Depends(get_db)):
     normalized_email = email.strip().lower()
-    result = await db.execute(select(VerificationToken).where(
-        VerificationToken.email == normalized_email,
-        VerificationToken.token == code,
-        VerificationToken.expires_at > datetime.utcnow()
-    ))
-    token = result.scalars().first()
-    if not token:
+    if not await consume_code(db, normalized_email, code):
         raise HTTPException(status_code=400, detail="Invalid or expired verification code.")
-    await db.delete(token)
-    await db.commit()
     return {"message": "Email verified."}
 
 
@@ -134,7 +111,7 @@ async def login_staff(payload: StaffLoginRequest, db: AsyncSession = Depends(get
         print("❌ Token has expired.")
         raise HTTPException(status_code=401, detail="Invalid or expired token.")
 
-    if not pwd_context.verify(payload.token, user.password_hash):
+    if not await verify_password(payload.token, user.password_hash):
         print("❌ Token does not match the stored hash.")
         raise HTTPException(status_code=401, detail="Invalid token.")
 
@@ -161,7 +138,7 @@ async def login_company(payload: LoginRequest, db: AsyncSession = Depends(get_db
     normalized_email = payload.email.strip().lower()
     result = await db.execute(select(Company).where(Company.email == normalized_email))
     company = result.scalars().first()
-    if not company or not pwd_context.verify(payload.password, company.password_hash):
+    if not company or not await verify_password(payload.password, company.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials.")
     payload = {
         "sub": str(company.email),
@@ -179,12 +156,18 @@ async def login_company(payload: LoginRequest, db: AsyncSession = Depends(get_db
 async def get_current_company(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        company_id = payload.get("company_id")
+        if company_id is not None:
+            company = get_cached_company(company_id)
+            if company:
+                return company
+
         email = payload.get("sub")
         result = await db.execute(select(Company).where(Company.email == email.strip().lower()))
         company = result.scalars().first()
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
-        return company
+        return cache_company(company)
     except JWTError:
         raise HTTPException(status_code=403, detail="Invalid token")
 
@@ -206,14 +189,37 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("user_id")
+        user = get_cached_user(user_id)
+        if user:
+            return user
+
         result = await db.execute(select(User).where(User.id == user_id))
         user = result.scalars().first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        return user
+        return cache_user(user)
     except JWTError:
         raise HTTPException(status_code=403, detail="Invalid token")
 
+# -----------------------
+# Get Current Tenant (company, or staff user without one)
+# -----------------------
+async def get_current_tenant(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Tuple[str, int]:
+    """Who the request acts for: ``("company", id)`` for company tokens and for
+    staff of a company, ``("user", id)`` for staff without one."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=403, detail="Invalid token")
+    if payload.get("user_id") is not None:
+        user = await get_current_user(token, db)
+        if user.company_id is None:
+            return "user", user.id
+        return "company", user.company_id
+    company = await get_current_company(token, db)
+    return "company", company.id
+
+
 @router.get("/user/me", response_model=UserOut)
 async def read_current_user(current_user: User = Depends(get_current_user)):
     return current_user
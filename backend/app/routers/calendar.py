@@ -1,15 +1,12 @@
 # app/routers/calendar.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.database import SessionLocal, CalendarEvent, CalendarEventCreate
+from app.database import CalendarEvent, CalendarEventCreate, get_db
+from app.services.pagination import Keyset, PageParams, page_params
 
 router = APIRouter()
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 @router.post("/calendar/events")
 async def create_calendar_event(event: CalendarEventCreate, db: AsyncSession = Depends(get_db)):
     db_event = CalendarEvent(
@@ -27,12 +24,19 @@ async def create_calendar_event(event: CalendarEventCreate, db: AsyncSession = D
     await db.refresh(db_event)
     return db_event
 
+event_keyset = Keyset(CalendarEvent.start_time, CalendarEvent.id)
+
+
 @router.get("/calendar/events")
-async def get_calendar_events(company_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(CalendarEvent).where(CalendarEvent.company_id == company_id)
-    )
-    return result.scalars().all()
+async def get_calendar_events(
+    company_id: int,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = select(CalendarEvent).where(CalendarEvent.company_id == company_id)
+    result = await db.execute(event_keyset.apply(stmt, page))
+    return event_keyset.finish(result.scalars().all(), page, response)
 
 @router.delete("/calendar/events/{event_id}")
 async def delete_calendar_event(event_id: int, db: AsyncSession = Depends(get_db)):
@@ -4,12 +4,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import RedirectResponse
 import secrets
 import urllib.parse
-import httpx
 from datetime import datetime, timedelta
 import os
 
 
-from app.database import SessionLocal, CanvaIntegration
+from app.database import CanvaIntegration, get_db
+from app.services.oauth_state import create_state_store
+from app.services.http_client import http_clients
 
 router = APIRouter()
 
@@ -21,16 +22,12 @@ CANVA_REDIRECT_URI = os.getenv("CANVA_REDIRECT_URI")
 CANVA_OAUTH_AUTHORIZE_URL = "https://api.canva.com/oauth/authorize"
 CANVA_OAUTH_TOKEN_URL = "https://api.canva.com/v1/oauth/token"
 
-state_store = {}
-
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
+state_store = create_state_store("canva")
 
 @router.get("/oauth/canva/start")
 async def canva_oauth_start(company_id: int):
     state = secrets.token_urlsafe(32)
-    state_store[state] = {"company_id": company_id, "expires": datetime.utcnow() + timedelta(minutes=10)}
+    await state_store.put(state, {"company_id": company_id}, expires=datetime.utcnow() + timedelta(minutes=10))
     params = {
         "client_id": CANVA_CLIENT_ID,
         "redirect_uri": CANVA_REDIRECT_URI,
@@ -43,24 +40,24 @@ async def canva_oauth_start(company_id: int):
 
 @router.get("/oauth/canva/callback")
 async def canva_oauth_callback(code: str, state: str, db: AsyncSession = Depends(get_db)):
-    state_data = state_store.pop(state, None)
+    state_data = await state_store.pop(state)
     if not state_data:
         raise HTTPException(status_code=400, detail="Invalid state")
 
     company_id = state_data["company_id"]
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            CANVA_OAUTH_TOKEN_URL,
-            data={
-                "grant_type": "authorization_code",
-                "code": code,
-                "client_id": CANVA_CLIENT_ID,
-                "client_secret": CANVA_CLIENT_SECRET,
-                "redirect_uri": CANVA_REDIRECT_URI,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+    client = http_clients.get("canva")
+    response = await client.post(
+        CANVA_OAUTH_TOKEN_URL,
+        data={
+            "grant_type": "authorization_code",
+            "code": code,
+            "client_id": CANVA_CLIENT_ID,
+            "client_secret": CANVA_CLIENT_SECRET,
+            "redirect_uri": CANVA_REDIRECT_URI,
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
 
     if response.status_code != 200:
         print("❌ Canva Token Exchange Failed:", response.text)
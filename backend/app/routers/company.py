@@ -1,15 +1,14 @@
 # app/routers/company.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.database import SessionLocal, Company, CompanyCreate
+from app.database import Company, CompanyCreate, get_db
+from app.services.kanban import provision_default_board
+from app.services.pagination import Keyset, PageParams, page_params
+from app.services.principals import invalidate_company
 
 router = APIRouter()
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 @router.post("/company/register")
 async def register_company(data: CompanyCreate, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Company).where(Company.email == data.email))
@@ -22,11 +21,19 @@ async def register_company(data: CompanyCreate, db: AsyncSession = Depends(get_d
         password_hash=data.password  # assumes hash is done externally
     )
     db.add(new_company)
+    await db.flush()
+    await provision_default_board(db, new_company.id)
     await db.commit()
-    await db.refresh(new_company)
+    invalidate_company(new_company.id)
     return {"message": "Company registered", "company_id": new_company.id}
 
+company_keyset = Keyset(Company.id)
+
 @router.get("/company/list")
-async def list_companies(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Company))
-    return result.scalars().all()
+async def list_companies(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(company_keyset.apply(select(Company), page))
+    return company_keyset.finish(result.scalars().all(), page, response)
@@ -1,30 +1,60 @@
 # app/routers/copilot.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import httpx
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
+import asyncio
+import json
+import logging
 import os
+import time
 
-from app.database import SessionLocal, CopilotRequest, CopilotResponse
+from app.database import SessionLocal, CopilotRequest, CopilotResponse, CopilotBatchRequest
+from app.routers.auth import get_current_tenant
+from app.services.http_client import http_clients
+from app.services.cache import TTLCache, SingleFlight
+from app.services.rate_limit import TokenBucket, TokenBucketRegistry
 router = APIRouter()
 
 
 
 # API Configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
-OPENROUTER_MODEL = "gpt-4o"  # Model used
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "gpt-4o")  # Model used
+COPILOT_TEMPERATURE = 0.7
 
+# Response cache
+COPILOT_CACHE_TTL_SECONDS = float(os.getenv("COPILOT_CACHE_TTL_SECONDS", "3600"))
+COPILOT_CACHE_MAX_ENTRIES = int(os.getenv("COPILOT_CACHE_MAX_ENTRIES", "2000"))
+
+response_cache = TTLCache(COPILOT_CACHE_MAX_ENTRIES, COPILOT_CACHE_TTL_SECONDS)
+in_flight = SingleFlight()
+
+# Batch generation
+COPILOT_BATCH_MAX_PROMPTS = int(os.getenv("COPILOT_BATCH_MAX_PROMPTS", "100"))
+COPILOT_BATCH_CONCURRENCY = int(os.getenv("COPILOT_BATCH_CONCURRENCY", "5"))
+
+# Rate limit, one bucket per company (staff share their company's), shared by every endpoint
+COPILOT_RATE_PER_MINUTE = float(os.getenv("COPILOT_RATE_PER_MINUTE", "60"))
+COPILOT_RATE_BURST = float(os.getenv("COPILOT_RATE_BURST", "20"))
+COPILOT_RATE_MAX_WAIT_SECONDS = float(os.getenv("COPILOT_RATE_MAX_WAIT_SECONDS", "30"))
+
+company_rate_limits = TokenBucketRegistry(COPILOT_RATE_PER_MINUTE / 60, COPILOT_RATE_BURST)
+
+logger = logging.getLogger(__name__)
 
 
 # ✅ CoPilot generation function
-async def generate_copilot_response(prompt: str) -> str:
+def build_copilot_request(prompt: str, model: str, temperature: float, stream: bool = False) -> tuple[dict, dict]:
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
     }
 
     body = {
-        "model": OPENROUTER_MODEL,
+        "model": model,
         "messages": [
             {"role": "system", "content": (
                 "You are an expert AI assistant that helps users write social media captions, hashtags, email subject lines, "
@@ -33,21 +63,239 @@ async def generate_copilot_response(prompt: str) -> str:
             {"role": "user", "content": prompt}
         ],
         "max_tokens": 500,
-        "temperature": 0.7,
+        "temperature": temperature,
     }
+    if stream:
+        body["stream"] = True
+
+    return headers, body
+
+
+async def generate_copilot_response(
+    prompt: str,
+    model: str = OPENROUTER_MODEL,
+    temperature: float = COPILOT_TEMPERATURE,
+) -> str:
+    headers, body = build_copilot_request(prompt, model, temperature)
+
+    client = http_clients.get("openrouter")
+    response = await client.post(OPENROUTER_API_URL, headers=headers, json=body)
+    response.raise_for_status()
+    data = response.json()
+
+    return data["choices"][0]["message"]["content"]
+
+
+async def stream_copilot_response(
+    prompt: str,
+    model: str = OPENROUTER_MODEL,
+    temperature: float = COPILOT_TEMPERATURE,
+) -> AsyncIterator[str]:
+    """Yield content deltas from an OpenRouter ``stream: true`` completion.
+
+    Leaving the ``async with`` (including via cancellation) closes the
+    upstream response, which aborts the generation.
+    """
+    headers, body = build_copilot_request(prompt, model, temperature, stream=True)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(OPENROUTER_API_URL, headers=headers, json=body)
+    client = http_clients.get("openrouter")
+    async with client.stream("POST", OPENROUTER_API_URL, headers=headers, json=body) as response:
         response.raise_for_status()
-        data = response.json()
+        async for line in response.aiter_lines():
+            # OpenRouter interleaves ": OPENROUTER PROCESSING" keep-alive comments
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"].get("message", "upstream error"))
+            choices = chunk.get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+
+def normalize_prompt(prompt: str) -> str:
+    # Whitespace only: case can matter (acronyms, names, code).
+    return " ".join(prompt.split())
+
+
+async def cached_copilot_response(
+    prompt: str,
+    fresh: bool = False,
+    model: str = OPENROUTER_MODEL,
+    temperature: float = COPILOT_TEMPERATURE,
+) -> tuple[str, bool]:
+    """Return ``(response, cache_hit)``.
+
+    Identical prompts that are already in flight share one upstream call;
+    ``fresh`` skips the cache lookup but still stores the new generation.
+    """
+    key = (normalize_prompt(prompt), model, temperature)
+    if not fresh:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, True
+
+    async def generate():
+        result = await generate_copilot_response(prompt, model, temperature)
+        response_cache.set(key, result)
+        return result
+
+    return await in_flight.do(key, generate), False
+
+
+def wants_fresh(cache_control: Optional[str]) -> bool:
+    return bool(cache_control) and "no-cache" in cache_control.lower()
+
+
+def copilot_bucket(tenant: tuple = Depends(get_current_tenant)) -> TokenBucket:
+    return company_rate_limits.get(tenant)
+
 
-        return data["choices"][0]["message"]["content"]
+async def take_token(bucket: TokenBucket) -> bool:
+    if await bucket.acquire(max_wait=COPILOT_RATE_MAX_WAIT_SECONDS):
+        return True
+    company_rate_limits.rejected += 1
+    return False
 
-@router.post("/copilot/chat", response_model=CopilotResponse)
-async def copilot_chat(request: CopilotRequest):
+
+async def rate_limited(bucket: TokenBucket = Depends(copilot_bucket)):
+    """Spend one token for a single-prompt request, or answer 429."""
+    if not await take_token(bucket):
+        raise HTTPException(status_code=429, detail="Rate limit exceeded, please retry later.")
+
+
+@router.post("/copilot/chat", response_model=CopilotResponse, dependencies=[Depends(rate_limited)])
+async def copilot_chat(
+    request: CopilotRequest,
+    response: Response,
+    cache_control: Optional[str] = Header(None),
+):
     try:
-        ai_response = await generate_copilot_response(request.prompt)
+        ai_response, hit = await cached_copilot_response(request.prompt, fresh=wants_fresh(cache_control))
+        response.headers["X-Cache"] = "HIT" if hit else "MISS"
         return CopilotResponse(response=ai_response)
     except Exception as e:
         print("❌ Copilot Error:", str(e))
         raise HTTPException(status_code=500, detail="Failed to generate AI response.")
+
+
+# ----------------------
+# POST: Streaming chat (Server-Sent Events)
+# ----------------------
+class StreamMetrics:
+    def __init__(self):
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.ttft_count = 0
+        self.ttft_total = 0.0
+        self.ttft_max = 0.0
+
+    def record_ttft(self, seconds: float):
+        self.ttft_count += 1
+        self.ttft_total += seconds
+        self.ttft_max = max(self.ttft_max, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "started": self.started,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "ttft_avg_ms": round(1000 * self.ttft_total / self.ttft_count, 2) if self.ttft_count else 0.0,
+            "ttft_max_ms": round(1000 * self.ttft_max, 2),
+        }
+
+
+stream_metrics = StreamMetrics()
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def copilot_sse_events(prompt: str) -> AsyncIterator[str]:
+    stream_metrics.started += 1
+    start = time.perf_counter()
+    first_token = None
+    try:
+        async with aclosing(stream_copilot_response(prompt)) as deltas:
+            async for delta in deltas:
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                    stream_metrics.record_ttft(first_token)
+                    logger.info("Copilot stream time-to-first-token: %.0f ms", first_token * 1000)
+                yield sse_event({"delta": delta})
+        stream_metrics.completed += 1
+        yield "data: [DONE]\n\n"
+    except (asyncio.CancelledError, GeneratorExit):
+        # Client went away; the upstream request was closed on the way out.
+        stream_metrics.cancelled += 1
+        logger.info("Copilot stream cancelled by client after %.0f ms", (time.perf_counter() - start) * 1000)
+        raise
+    except Exception as e:
+        stream_metrics.failed += 1
+        print("❌ Copilot Stream Error:", str(e))
+        yield sse_event({"detail": "Failed to generate AI response."}, event="error")
+
+
+@router.post("/copilot/chat/stream", dependencies=[Depends(rate_limited)])
+async def copilot_chat_stream(request: CopilotRequest):
+    return StreamingResponse(
+        copilot_sse_events(request.prompt),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ----------------------
+# POST: Batch generation (NDJSON, one line per finished prompt)
+# ----------------------
+async def copilot_batch_results(bucket: TokenBucket, prompts: List[str], fresh: bool) -> AsyncIterator[str]:
+    semaphore = asyncio.Semaphore(COPILOT_BATCH_CONCURRENCY)
+
+    async def run(index: int, prompt: str) -> dict:
+        if not await take_token(bucket):
+            return {"index": index, "error": "Rate limit exceeded, please retry later."}
+        async with semaphore:
+            try:
+                text, hit = await cached_copilot_response(prompt, fresh=fresh)
+                return {"index": index, "response": text, "cached": hit}
+            except Exception as e:
+                print("❌ Copilot Batch Error:", str(e))
+                return {"index": index, "error": "Failed to generate AI response."}
+
+    tasks = [asyncio.ensure_future(run(i, prompt)) for i, prompt in enumerate(prompts)]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            succeeded += "response" in item
+            yield json.dumps(item) + "\n"
+        yield json.dumps({"done": True, "succeeded": succeeded, "failed": len(prompts) - succeeded}) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/copilot/batch")
+async def copilot_batch(
+    request: CopilotBatchRequest,
+    cache_control: Optional[str] = Header(None),
+    bucket: TokenBucket = Depends(copilot_bucket),
+):
+    if not request.prompts:
+        raise HTTPException(status_code=400, detail="No prompts given.")
+    if len(request.prompts) > COPILOT_BATCH_MAX_PROMPTS:
+        raise HTTPException(status_code=413, detail=f"At most {COPILOT_BATCH_MAX_PROMPTS} prompts per batch.")
+
+    return StreamingResponse(
+        copilot_batch_results(bucket, request.prompts, wants_fresh(cache_control)),
+        media_type="application/x-ndjson",
+    )
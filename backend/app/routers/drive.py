@@ -1,27 +1,32 @@
 # app/routers/drive.py
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-from app.database import DriveFile, SessionLocal, DriveFileCreate, DriveFileOut, DocumentPermission
+from app.database import DriveFile, DriveFileCreate, DriveFileOut, DocumentPermission, get_db
+from app.services.pagination import Keyset, PageParams, page_params
 from sqlalchemy.future import select
 import os
 
 router = APIRouter(prefix="/api/drive", tags=["Drive"])
 
-# Dependency
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 # -------------------------
 # List files for a company
 # -------------------------
+file_keyset = Keyset(DriveFile.id)
+
+
 @router.get("/files/{company_id}", response_model=List[DriveFileOut])
-async def list_files(company_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(DriveFile).where(DriveFile.company_id == company_id))
-    return result.scalars().all()
+async def list_files(
+    company_id: int,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = select(DriveFile).where(DriveFile.company_id == company_id)
+    result = await db.execute(file_keyset.apply(stmt, page))
+    return file_keyset.finish(result.scalars().all(), page, response)
 
 # ---------------------
 # Upload new file(s)
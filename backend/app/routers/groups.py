@@ -1,11 +1,15 @@
 # app/routers/groups.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 
 from app.database import (
+    get_db,
     SessionLocal,
     Group,
     GroupMember,
@@ -15,49 +19,44 @@ from app.database import (
     GroupMessage,
     GroupMessageCreate,
     GroupMessageOut,
+    GroupReadMarker,
+    GroupReadUpdate,
+    GroupUnreadOut,
     User,
     Company,
 )
+from app.services.batching import InsertBatcher
+from app.services.notify import LONG_POLL_MAX_SECONDS, ChangeNotifier, poll_since, sync_overlap_cutoff
+from app.services.pagination import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, Keyset, PageParams, page_params
+from app.services.partitions import RECENT_HISTORY_DAYS, recent_cutoff
+from app.services.principals import get_sender_name
+from app.services.read_markers import mark_read, record_sent_messages
+from app.services.realtime import TopicHub
+from app.services.serialization import fast_json
 
 router = APIRouter(prefix="/api/groups", tags=["Groups"])
 
-# Dependency to get DB session
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 # ----------------------
 # GET: List All Groups
 # ----------------------
-@router.get("", response_model=List[GroupOut])
-async def get_groups(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Group).options(
-            selectinload(Group.members).selectinload(GroupMember.user)
-        )
-    )
-    groups = result.scalars().unique().all()
+group_out_list = TypeAdapter(List[GroupOut])
 
-    output = []
 
-    for group in groups:
-        member_out = []
-        for member in group.members:
-            if member.user:
-                member_out.append(GroupMemberOut(
-                    id=member.id,
-                    user_id=member.user_id,
-                    full_name=member.user.full_name
-                ))
+@router.get("", response_model=List[GroupOut], response_class=ORJSONResponse)
+async def get_groups(db: AsyncSession = Depends(get_db)):
+    groups = await db.execute(select(Group.id, Group.name, Group.created_at).order_by(Group.id))
+    output = {row.id: {**row._asdict(), "members": []} for row in groups}
 
-        output.append(GroupOut(
-            id=group.id,
-            name=group.name,
-            created_at=group.created_at,
-            members=member_out
-        ))
+    members = await db.execute(
+        select(GroupMember.group_id, GroupMember.id, GroupMember.user_id, User.full_name)
+        .join(User, User.id == GroupMember.user_id)
+        .order_by(GroupMember.id)
+    )
+    for group_id, member_id, user_id, full_name in members:
+        if group_id in output:
+            output[group_id]["members"].append({"id": member_id, "user_id": user_id, "full_name": full_name})
 
-    return output
+    return fast_json(group_out_list, output.values())
 
 
 # ----------------------
@@ -86,36 +85,93 @@ async def create_group(data: GroupCreate, db: AsyncSession = Depends(get_db)):
 # ----------------------
 # GET: Messages for a Group
 # ----------------------
-@router.get("/messages/{group_id}", response_model=List[GroupMessageOut])
-async def get_group_messages(group_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(GroupMessage).where(GroupMessage.group_id == group_id).order_by(GroupMessage.timestamp)
+message_keyset = Keyset(GroupMessage.timestamp, GroupMessage.id)
+
+
+def group_messages_with_senders():
+    """Messages plus both possible sender names, resolved in the same query."""
+    return (
+        select(GroupMessage, User.full_name, Company.company_name)
+        .outerjoin(User, User.id == GroupMessage.sender_user_id)
+        .outerjoin(Company, Company.id == GroupMessage.sender_company_id)
     )
-    messages = result.scalars().all()
 
-    enriched = []
-    for msg in messages:
-        sender_name = None
-        if msg.sender_user_id:
-            user_result = await db.execute(select(User).where(User.id == msg.sender_user_id))
-            user = user_result.scalar_one_or_none()
-            sender_name = user.full_name if user else None
-        elif msg.sender_company_id:
-            company_result = await db.execute(select(Company).where(Company.id == msg.sender_company_id))
-            company = company_result.scalar_one_or_none()
-            sender_name = company.company_name if company else None
-
-        enriched.append(GroupMessageOut(
-            id=msg.id,
-            group_id=msg.group_id,
-            content=msg.content,
-            timestamp=msg.timestamp,
-            sender_user_id=msg.sender_user_id,
-            sender_company_id=msg.sender_company_id,
-            sender_name=sender_name
-        ))
 
-    return enriched
+def group_message_out(msg: GroupMessage, sender_name: Optional[str]) -> GroupMessageOut:
+    return GroupMessageOut(
+        id=msg.id,
+        group_id=msg.group_id,
+        content=msg.content,
+        timestamp=msg.timestamp,
+        sender_user_id=msg.sender_user_id,
+        sender_company_id=msg.sender_company_id,
+        sender_name=sender_name
+    )
+
+
+@router.get("/messages/{group_id}", response_model=List[GroupMessageOut])
+async def get_group_messages(
+    group_id: int,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    since_id: Optional[int] = None,
+    wait: float = Query(0, ge=0, le=LONG_POLL_MAX_SECONDS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Paged history, or with ``since_id`` only newer messages; ``wait`` long-polls for them.
+
+    A ``since_id`` read also repeats messages at or below ``since_id`` from the
+    last SYNC_OVERLAP_SECONDS, so one that committed late is not skipped;
+    clients de-duplicate by id.
+    """
+    stmt = group_messages_with_senders().where(GroupMessage.group_id == group_id)
+    if since_id is None:
+        result = await db.execute(message_keyset.apply(stmt, page))
+        rows = message_keyset.finish(
+            result.all(), page, response,
+            key=lambda row: (row.GroupMessage.timestamp, row.GroupMessage.id),
+        )
+    else:
+        async def fetch():
+            result = await db.execute(
+                stmt.where(GroupMessage.id > since_id).order_by(GroupMessage.id).limit(page.size)
+            )
+            return result.all()
+
+        async def fetch_overlap():
+            result = await db.execute(
+                stmt.where(GroupMessage.id <= since_id, GroupMessage.timestamp >= sync_overlap_cutoff())
+                .order_by(GroupMessage.id)
+                .limit(page.size)
+            )
+            return result.all()
+
+        rows = await poll_since(db, group_updates, group_id, wait, fetch, fetch_overlap)
+
+    return [
+        group_message_out(msg, user_name if msg.sender_user_id else company_name)
+        for msg, user_name, company_name in rows
+    ]
+
+
+@router.get("/messages/{group_id}/recent", response_model=List[GroupMessageOut])
+async def get_recent_group_messages(
+    group_id: int,
+    days: int = Query(RECENT_HISTORY_DAYS, ge=1, le=366),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+):
+    """The newest ``limit`` messages of the last ``days`` days, oldest first."""
+    result = await db.execute(
+        group_messages_with_senders()
+        .where(GroupMessage.group_id == group_id, GroupMessage.timestamp >= recent_cutoff(days))
+        .order_by(GroupMessage.timestamp.desc(), GroupMessage.id.desc())
+        .limit(limit)
+    )
+    return [
+        group_message_out(msg, user_name if msg.sender_user_id else company_name)
+        for msg, user_name, company_name in reversed(result.all())
+    ]
 
 # ----------------------
 # GET: Single Group by ID
@@ -153,6 +209,14 @@ async def get_group_by_id(group_id: int, db: AsyncSession = Depends(get_db)):
 # ----------------------
 @router.post("/messages", response_model=GroupMessageOut)
 async def send_group_message(payload: GroupMessageCreate, db: AsyncSession = Depends(get_db)):
+    if group_message_batcher.enabled:
+        return await group_message_batcher.submit({
+            "group_id": payload.group_id,
+            "content": payload.content,
+            "sender_user_id": payload.sender_user_id,
+            "sender_company_id": payload.sender_company_id,
+        })
+
     msg = GroupMessage(
         group_id=payload.group_id,
         content=payload.content,
@@ -160,40 +224,72 @@ async def send_group_message(payload: GroupMessageCreate, db: AsyncSession = Dep
         sender_company_id=payload.sender_company_id
     )
     db.add(msg)
+    await db.flush()
+    await record_sent_messages(db, [msg])
     await db.commit()
     await db.refresh(msg)
 
-    sender_name = None
-    if msg.sender_user_id:
-        user_result = await db.execute(select(User).where(User.id == msg.sender_user_id))
-        user = user_result.scalar_one_or_none()
-        sender_name = user.full_name if user else None
-    elif msg.sender_company_id:
-        company_result = await db.execute(select(Company).where(Company.id == msg.sender_company_id))
-        company = company_result.scalar_one_or_none()
-        sender_name = company.company_name if company else None
+    sender_name = await get_sender_name(db, msg.sender_user_id, msg.sender_company_id)
+    out = group_message_out(msg, sender_name)
+    await group_hub.publish(db, msg.group_id, msg.id, out.model_dump_json())
+    return out
 
-    return GroupMessageOut(
-        id=msg.id,
-        group_id=msg.group_id,
-        content=msg.content,
-        timestamp=msg.timestamp,
-        sender_user_id=msg.sender_user_id,
-        sender_company_id=msg.sender_company_id,
-        sender_name=sender_name
-    )
+
+async def group_messages_inserted(db: AsyncSession, messages: List[GroupMessage]) -> List[GroupMessageOut]:
+    # Runs inside the batch transaction, so counters and NOTIFYs go out with its commit.
+    await record_sent_messages(db, messages)
+    outs = []
+    for msg in messages:
+        sender_name = await get_sender_name(db, msg.sender_user_id, msg.sender_company_id)
+        out = group_message_out(msg, sender_name)
+        await group_hub.publish(db, msg.group_id, msg.id, out.model_dump_json(), commit=False)
+        outs.append(out)
+    return outs
+
+
+# Optional group commit for bursts of messages (MESSAGE_BATCHING=true)
+group_message_batcher = InsertBatcher(GroupMessage, on_flush=group_messages_inserted)
+
+
+# ----------------------
+# WebSocket: live messages for a group
+# ----------------------
+async def load_group_message_json(message_id: int) -> Optional[str]:
+    async with SessionLocal() as db:
+        result = await db.execute(group_messages_with_senders().where(GroupMessage.id == message_id))
+        row = result.first()
+    if row is None:
+        return None
+    msg, user_name, company_name = row
+    return group_message_out(msg, user_name if msg.sender_user_id else company_name).model_dump_json()
+
+
+# Wakes long-polling readers of a group. Fed by the hub, so on PostgreSQL
+# messages sent from any worker wake readers on this one.
+group_updates = ChangeNotifier()
+group_hub = TopicHub("group_messages", load_group_message_json, on_message=group_updates.notify)
+
+
+@router.websocket("/ws/{group_id}")
+async def group_messages_socket(websocket: WebSocket, group_id: int):
+    await websocket.accept()
+    await group_hub.serve(websocket, group_id)
 
 
 # ----------------------
 # GET: Groups for a specific user
 # ----------------------
+def groups_of_user(user_id: int, *columns):
+    """Select ``columns`` (default: the Group entity) for every group ``user_id`` belongs to."""
+    return select(*(columns or (Group,))).join(GroupMember, GroupMember.group_id == Group.id).where(
+        GroupMember.user_id == user_id
+    )
+
+
 @router.get("/user/{user_id}", response_model=List[GroupOut])
 async def get_groups_for_user(user_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
-        select(Group)
-        .join(GroupMember)
-        .where(GroupMember.user_id == user_id)
-        .options(selectinload(Group.members).selectinload(GroupMember.user))
+        groups_of_user(user_id).options(selectinload(Group.members).selectinload(GroupMember.user))
     )
     groups = result.scalars().unique().all()
 
@@ -218,3 +314,38 @@ async def get_groups_for_user(user_id: int, db: AsyncSession = Depends(get_db)):
 
     return output
 
+
+# ----------------------
+# Unread counts and read markers
+# ----------------------
+@router.get("/user/{user_id}/unread", response_model=List[GroupUnreadOut])
+async def get_unread_counts(user_id: int, db: AsyncSession = Depends(get_db)):
+    """Unread counts for every group of the user, read from the maintained markers in one query."""
+    result = await db.execute(
+        groups_of_user(
+            user_id,
+            Group.id.label("group_id"),
+            Group.name,
+            func.coalesce(GroupReadMarker.unread_count, 0).label("unread_count"),
+            GroupReadMarker.last_read_message_id,
+        )
+        .outerjoin(
+            GroupReadMarker,
+            (GroupReadMarker.group_id == Group.id) & (GroupReadMarker.user_id == user_id),
+        )
+        .distinct()
+        .order_by(Group.id)
+    )
+    return [GroupUnreadOut(**row._asdict()) for row in result]
+
+
+@router.post("/{group_id}/read")
+async def mark_group_read(group_id: int, data: GroupReadUpdate, db: AsyncSession = Depends(get_db)):
+    membership = await db.execute(
+        select(GroupMember.id).where(GroupMember.group_id == group_id, GroupMember.user_id == data.user_id).limit(1)
+    )
+    if membership.first() is None:
+        raise HTTPException(status_code=403, detail="User is not a member of this group")
+    last_read_message_id, unread_count = await mark_read(db, data.user_id, group_id, data.last_read_message_id)
+    await db.commit()
+    return {"group_id": group_id, "last_read_message_id": last_read_message_id, "unread_count": unread_count}
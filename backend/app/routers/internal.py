@@ -0,0 +1,63 @@
+# app/routers/internal.py
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+from dataclasses import asdict
+import os
+import secrets
+
+from app.database import engine, read_engine, db_profile, pool_stats
+from app.services.passwords import password_hasher
+from app.services.principals import principal_cache, sender_name_cache
+from app.services.mailer import mail_dispatcher
+from app.services.http_client import http_clients
+from app.services import verification
+from app.services.partitions import partition_maintenance
+from app.routers.canva import state_store as canva_state_store
+from app.routers import copilot, groups, messages
+from app.routers.tools import catalog_cache as tool_catalog_cache
+
+router = APIRouter(prefix="/api/internal", tags=["Internal"])
+
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    # Fails closed: with no INTERNAL_API_TOKEN configured these endpoints are off.
+    if not INTERNAL_API_TOKEN or not secrets.compare_digest(x_internal_token or "", INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+# ----------------------
+# GET: Runtime metrics
+# ----------------------
+@router.get("/metrics", dependencies=[Depends(require_internal_token)])
+async def get_metrics():
+    return {
+        "password_hasher": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "sender_name_cache": sender_name_cache.stats(),
+        "mail_dispatcher": mail_dispatcher.stats(),
+        "canva_oauth_state": canva_state_store.stats(),
+        "http_clients": http_clients.stats(),
+        "copilot_cache": {**copilot.response_cache.stats(), **copilot.in_flight.stats()},
+        "copilot_streams": copilot.stream_metrics.as_dict(),
+        "copilot_rate_limits": copilot.company_rate_limits.stats(),
+        "tool_catalog_cache": tool_catalog_cache.stats(),
+        "group_sockets": groups.group_hub.stats(),
+        "message_batching": {"groups": groups.group_message_batcher.stats(), "teams": messages.message_batcher.stats()},
+        "long_poll": {"groups": groups.group_updates.stats(), "teams": messages.team_updates.stats()},
+        "partition_maintenance": partition_maintenance.stats(),
+        "verification_tokens": {**verification.stats.as_dict(), "purge": verification.token_purger.stats()},
+    }
+
+
+# ----------------------
+# GET: Database pool statistics
+# ----------------------
+@router.get("/db/pool", dependencies=[Depends(require_internal_token)])
+async def get_db_pool():
+    return {
+        "profile": asdict(db_profile),
+        "primary": pool_stats(engine),
+        "replica": pool_stats(read_engine) if read_engine is not None else None,
+    }
@@ -5,17 +5,13 @@ from typing import Optional
 import shutil
 import os
 from datetime import datetime
-from app.database import SessionLocal, MediaAsset
+from app.database import MediaAsset, get_db
 
 router = APIRouter()
 
 MEDIA_UPLOAD_DIR = "uploaded_media"
 os.makedirs(MEDIA_UPLOAD_DIR, exist_ok=True)
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 @router.post("/api/media/upload")
 async def upload_media_file(
     file: UploadFile = File(...),
@@ -1,27 +1,87 @@
 # app/routers/messages.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.database import SessionLocal, Message, MessageCreate, MessageOut, User
+from typing import Optional
+from app.database import Message, MessageCreate, MessageOut, User, get_db
+from app.services.batching import InsertBatcher
+from app.services.notify import LONG_POLL_MAX_SECONDS, ChangeNotifier, poll_since, sync_overlap_cutoff
+from app.services.pagination import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, Keyset, PageParams, page_params
+from app.services.partitions import RECENT_HISTORY_DAYS, recent_cutoff
 
 router = APIRouter()
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
+# Wakes long-polling readers of a team when a message is sent from this worker.
+team_updates = ChangeNotifier()
+
+# Optional group commit for bursts of messages (MESSAGE_BATCHING=true)
+message_batcher = InsertBatcher(Message)
 
 @router.post("/messages", response_model=MessageOut)
 async def send_message(message: MessageCreate, db: AsyncSession = Depends(get_db)):
-    db_message = Message(team_id=message.team_id, sender_id=message.sender_id, content=message.content)
-    db.add(db_message)
-    await db.commit()
-    await db.refresh(db_message)
+    if message_batcher.enabled:
+        db_message = await message_batcher.submit(
+            {"team_id": message.team_id, "sender_id": message.sender_id, "content": message.content}
+        )
+    else:
+        db_message = Message(team_id=message.team_id, sender_id=message.sender_id, content=message.content)
+        db.add(db_message)
+        await db.commit()
+        await db.refresh(db_message)
+    team_updates.notify(db_message.team_id)
     return db_message
 
+message_keyset = Keyset(Message.timestamp, Message.id)
+
 @router.get("/messages", response_model=list[MessageOut])
-async def get_team_messages(team_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Message).where(Message.team_id == team_id).order_by(Message.created_at))
-    return result.scalars().all()
+async def get_team_messages(
+    team_id: int,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    since_id: Optional[int] = None,
+    wait: float = Query(0, ge=0, le=LONG_POLL_MAX_SECONDS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Paged history, or with ``since_id`` only newer messages; ``wait`` long-polls for them.
+
+    A ``since_id`` read also repeats messages at or below ``since_id`` from the
+    last SYNC_OVERLAP_SECONDS, so one that committed late is not skipped;
+    clients de-duplicate by id.
+    """
+    stmt = select(Message).where(Message.team_id == team_id)
+    if since_id is None:
+        result = await db.execute(message_keyset.apply(stmt, page))
+        return message_keyset.finish(result.scalars().all(), page, response)
+
+    async def fetch():
+        result = await db.execute(stmt.where(Message.id > since_id).order_by(Message.id).limit(page.size))
+        return result.scalars().all()
+
+    async def fetch_overlap():
+        result = await db.execute(
+            stmt.where(Message.id <= since_id, Message.timestamp >= sync_overlap_cutoff())
+            .order_by(Message.id)
+            .limit(page.size)
+        )
+        return result.scalars().all()
+
+    return await poll_since(db, team_updates, team_id, wait, fetch, fetch_overlap)
+
+@router.get("/messages/recent", response_model=list[MessageOut])
+async def get_recent_team_messages(
+    team_id: int,
+    days: int = Query(RECENT_HISTORY_DAYS, ge=1, le=366),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+):
+    """The newest ``limit`` messages of the last ``days`` days, oldest first."""
+    result = await db.execute(
+        select(Message)
+        .where(Message.team_id == team_id, Message.timestamp >= recent_cutoff(days))
+        .order_by(Message.timestamp.desc(), Message.id.desc())
+        .limit(limit)
+    )
+    return list(reversed(result.scalars().all()))
 
 @router.get("/chat/senders")
 async def get_chat_senders(user_id: int, db: AsyncSession = Depends(get_db)):
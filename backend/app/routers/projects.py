@@ -1,67 +1,67 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 from typing import List
 
 from app.database import (
-    SessionLocal,
+    get_db,
     Project,
     ProjectMember,
     ProjectCreate,
     ProjectOut,
-    UserOut
+    ProjectListOut,
+    User
 )
+from app.services.pagination import Keyset, PageParams, page_params
+from app.services.serialization import fast_json
 
 router = APIRouter(prefix="/api/projects", tags=["Projects"])
 
-# Dependency
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 # ----------------------
 # List All Projects
 # ----------------------
-@router.get("", response_model=List[ProjectOut])
-async def get_projects(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Project).options(
-        selectinload(Project.members).selectinload(ProjectMember.user),
-    ))
-    projects = result.scalars().unique().all()
+project_keyset = Keyset(Project.id)
+project_out_list = TypeAdapter(List[ProjectListOut])
+
 
-    project_list = []
+@router.get("", response_model=List[ProjectListOut], response_class=ORJSONResponse)
+async def get_projects(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = select(
+        Project.id, Project.name, Project.end_date, Project.status, Project.company_id,
+        Project.created_by_user_id, Project.created_by_company_id, Project.created_at,
+    )
+    result = await db.execute(project_keyset.apply(stmt, page))
+    rows = project_keyset.finish(result.all(), page, response)
+    projects = {row.id: {**row._asdict(), "members": []} for row in rows}
 
-    for project in projects:
-        members_out = []
-        for member in project.members:
-            user = member.user
-            members_out.append(UserOut(
-                id=user.id,
-                email=user.email,
-                full_name=user.full_name,
-                role=user.role,
-                is_active=user.is_active,
-                contract_expiry=user.contract_expiry,
-                groups=[],
-                tools=[],
-                projects=[],
-                documents=[]
-            ))
-        
-        project_list.append(ProjectOut(
-            id=project.id,
-            name=project.name,
-            end_date=project.end_date,
-            status=project.status,
-            company_id=project.company_id,
-            created_by_user_id=project.created_by_user_id,
-            created_by_company_id=project.created_by_company_id,
-            created_at=project.created_at,
-            members=members_out
-        ))
+    members_stmt = (
+        select(
+            ProjectMember.project_id, User.id, User.email, User.full_name,
+            User.role, User.is_active, User.contract_expiry,
+        )
+        .join(User, User.id == ProjectMember.user_id)
+        .where(ProjectMember.project_id.in_(projects.keys()))
+        .order_by(ProjectMember.id)
+    )
+    for project_id, *user in await db.execute(members_stmt):
+        if project_id in projects:
+            user_id, email, full_name, role, is_active, contract_expiry = user
+            projects[project_id]["members"].append({
+                "id": user_id,
+                "email": email,
+                "full_name": full_name,
+                "role": role,
+                "is_active": is_active,
+                "contract_expiry": contract_expiry,
+            })
 
-    return project_list
+    return fast_json(project_out_list, projects.values(), response)
 
 # ----------------------
 # Create New Project
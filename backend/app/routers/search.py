@@ -0,0 +1,101 @@
+# app/routers/search.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Float, Integer, String, cast, func, literal, literal_column, null, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import List, Optional
+
+from app.database import (
+    get_db,
+    engine,
+    search_vector,
+    SEARCH_TEXT_CONFIG,
+    CommunityPost,
+    DriveFile,
+    Group,
+    GroupMessage,
+    Message,
+    SearchHitOut,
+    SearchKind,
+    Team,
+)
+from app.routers.auth import get_current_tenant
+from app.services.pagination import Keyset, PageParams, page_params
+
+router = APIRouter(prefix="/api/search", tags=["Search"])
+
+SNIPPET_OPTIONS = "MaxFragments=1, MaxWords=20, MinWords=5"
+# Inlined rather than bound: a bound string would reach PostgreSQL as varchar, not regconfig.
+TEXT_CONFIG = literal_column(f"'{SEARCH_TEXT_CONFIG}'::regconfig")
+
+
+def search_hits(company_id: int, tsquery, kind: Optional[str]):
+    """One ranked row per match across every searchable table, scoped to ``company_id``."""
+
+    def hits(name, model, title, body, parent_id, created_at, *scope):
+        vector = search_vector(model)
+        return (
+            select(
+                literal(name, String).label("kind"),
+                model.id.label("id"),
+                func.ts_rank(vector, tsquery, type_=Float).label("rank"),
+                title.label("title"),
+                body.label("body"),
+                parent_id.label("parent_id"),
+                created_at.label("created_at"),
+            )
+            .select_from(model)
+            .where(vector.bool_op("@@")(tsquery), *scope)
+        )
+
+    no_title, no_parent = cast(null(), String), cast(null(), Integer)
+    branches = {
+        "group_message": hits(
+            "group_message", GroupMessage, no_title, GroupMessage.content, GroupMessage.group_id,
+            GroupMessage.timestamp, GroupMessage.group_id.in_(select(Group.id).where(Group.company_id == company_id)),
+        ),
+        "message": hits(
+            "message", Message, no_title, Message.content, Message.team_id,
+            Message.timestamp, Message.team_id.in_(select(Team.id).where(Team.company_id == company_id)),
+        ),
+        "file": hits(
+            "file", DriveFile, DriveFile.filename, DriveFile.path, no_parent,
+            DriveFile.created_at, DriveFile.company_id == company_id,
+        ),
+        "post": hits(
+            "post", CommunityPost, CommunityPost.summary, CommunityPost.content, no_parent,
+            CommunityPost.created_at, CommunityPost.company_id == company_id,
+        ),
+    }
+    if kind:
+        return branches[kind].subquery("hits")
+    return union_all(*branches.values()).subquery("hits")
+
+
+@router.get("", response_model=List[SearchHitOut])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Words, \"phrases\", or -excluded"),
+    kind: Optional[SearchKind] = None,
+    page: PageParams = Depends(page_params),
+    tenant: tuple = Depends(get_current_tenant),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ranked matches in the caller's company's chat, drive and community posts, best first."""
+    tenant_kind, company_id = tenant
+    if tenant_kind != "company":
+        raise HTTPException(status_code=403, detail="Search is only available to company members.")
+    if engine.dialect.name != "postgresql":
+        raise HTTPException(status_code=501, detail="Search requires PostgreSQL.")
+
+    tsquery = func.websearch_to_tsquery(TEXT_CONFIG, q)
+    hits = search_hits(company_id, tsquery, kind)
+    keyset = Keyset(hits.c.rank, hits.c.kind, hits.c.id, descending=True)
+
+    stmt = select(
+        hits.c.kind, hits.c.id, hits.c.rank, hits.c.title, hits.c.parent_id, hits.c.created_at,
+        func.ts_headline(TEXT_CONFIG, hits.c.body, tsquery, SNIPPET_OPTIONS).label("snippet"),
+    )
+    result = await db.execute(keyset.apply(stmt, page))
+    rows = keyset.finish(result.all(), page, response)
+    return [SearchHitOut(**row._asdict()) for row in rows]
@@ -2,14 +2,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.database import SessionLocal, Team, TeamCreate, TeamOut
+from app.database import Team, TeamCreate, TeamOut, get_db
 
 router = APIRouter()
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 @router.post("/teams", response_model=TeamOut)
 async def create_team(team: TeamCreate, db: AsyncSession = Depends(get_db)):
     db_team = Team(company_id=team.company_id, name=team.name)
@@ -1,31 +1,63 @@
 # routers/tools.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
+from pydantic import TypeAdapter
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
 from typing import List, Optional
-from app.database import Tool, ToolCreate, ToolOut, ToolPermissionOut, ToolPermission, SessionLocal
+import hashlib
+import orjson
+import os
+from app.database import Tool, ToolCreate, ToolOut, ToolPermissionOut, ToolPermission, get_db
+from app.services.cache import VersionedCache
+from app.services.pagination import Keyset, PageParams, page_params
 
 router = APIRouter(prefix="/api/tools", tags=["Tools"])
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
+# The catalog changes only through create_tool, so the rendered list is cached
+# per process; the TTL bounds staleness for tools created on another worker.
+TOOLS_CACHE_TTL_SECONDS = float(os.getenv("TOOLS_CACHE_TTL_SECONDS", "60"))
+catalog_cache = VersionedCache(TOOLS_CACHE_TTL_SECONDS)
+tool_out_list = TypeAdapter(List[ToolOut])
+
+
+def unique_tools_query(dialect: str):
+    """First tool (lowest id) per case-insensitive title, in id order."""
+    title_key = func.lower(Tool.title)
+    if dialect == "postgresql":
+        first = select(Tool).distinct(title_key).order_by(title_key, Tool.id).subquery()
+        return select(aliased(Tool, first)).order_by(first.c.id)
+    first_ids = select(func.min(Tool.id)).group_by(title_key)
+    return select(Tool).where(Tool.id.in_(first_ids)).order_by(Tool.id)
 
-@router.get("/", response_model=List[ToolOut])
-async def get_tools(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Tool))
-    tools = result.scalars().all()
 
-    # Remove duplicates by title (case-insensitive)
-    seen_titles = set()
-    unique_tools = []
-    for tool in tools:
-        title_lower = tool.title.lower()
-        if title_lower not in seen_titles:
-            seen_titles.add(title_lower)
-            unique_tools.append(tool)
+async def load_catalog(db: AsyncSession) -> tuple[str, bytes]:
+    version = catalog_cache.version
+    # Read the primary: a lagging replica's catalog would be cached under the new version.
+    db.sync_session.use_replica = False
+    result = await db.execute(unique_tools_query(db.bind.dialect.name))
+    rows = tool_out_list.validate_python(result.scalars().all(), from_attributes=True)
+    body = orjson.dumps(tool_out_list.dump_python(rows))
+    entry = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+    catalog_cache.set(entry, version)
+    return entry
 
-    return unique_tools
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/", response_model=List[ToolOut])
+async def get_tools(if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+    etag, body = catalog_cache.get() or await load_catalog(db)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("/", response_model=ToolOut)
@@ -33,13 +65,21 @@ async def create_tool(payload: ToolCreate, db: AsyncSession = Depends(get_db)):
     tool = Tool(**payload.dict())
     db.add(tool)
     await db.commit()
+    catalog_cache.bump()
     await db.refresh(tool)
     return tool
 
 
+permission_keyset = Keyset(ToolPermission.id)
+
+
 @router.get("/permissions/tools", response_model=List[ToolPermissionOut])
-async def get_tool_permissions(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(ToolPermission))
-    return result.scalars().all()
+async def get_tool_permissions(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(permission_keyset.apply(select(ToolPermission), page))
+    return permission_keyset.finish(result.scalars().all(), page, response)
 
 
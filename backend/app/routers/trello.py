@@ -1,22 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import contains_eager
 from app.database import (
-    SessionLocal, KanbanColumn, KanbanTask, Company,
-    KanbanColumnCreate, KanbanColumnOut,
+    get_db, KanbanColumn, KanbanTask,
+    KanbanColumnCreate, KanbanColumnOut, KanbanColumnWithTasksOut,
     KanbanTaskCreate, KanbanTaskOut
 )
 
 router = APIRouter(prefix="/trello")
 
 
-async def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        await db.close()
-
 # ----------------------
 # Create Column
 # ----------------------
@@ -29,38 +23,29 @@ async def create_column(column: KanbanColumnCreate, db: AsyncSession = Depends(g
     return new_column
 
 # ----------------------
-# Get Columns with Tasks – for all companies
+# Get Columns of one company
 # ----------------------
 @router.get("/columns", response_model=list[KanbanColumnOut])
-async def get_columns(db: AsyncSession = Depends(get_db)):
-    companies = (await db.execute(select(Company))).scalars().all()
-
-    for company in companies:
-        existing = (await db.execute(
-            select(KanbanColumn).where(KanbanColumn.company_id == company.id)
-        )).scalars().all()
-
-        if not existing:
-            # Only To Do gets tasks
-            todo_col = KanbanColumn(title="To Do", company_id=company.id)
-            in_progress_col = KanbanColumn(title="In Progress", company_id=company.id)
-            done_col = KanbanColumn(title="Done", company_id=company.id)
-
-            db.add_all([todo_col, in_progress_col, done_col])
-            await db.flush()  # Assign IDs
-
-            # Only add tasks to "To Do"
-            todo_tasks = [
-                "2026 THD Admission",
-                "Design homepage",
-            ]
-            for content in todo_tasks:
-                db.add(KanbanTask(content=content, column_id=todo_col.id, company_id=company.id))
+async def get_columns(company_id: int, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(KanbanColumn).where(KanbanColumn.company_id == company_id).order_by(KanbanColumn.id)
+    )
+    return result.scalars().all()
 
-    await db.commit()
 
-    all_columns = (await db.execute(select(KanbanColumn))).scalars().all()
-    return all_columns
+# ----------------------
+# Get a company's board: columns with their tasks
+# ----------------------
+@router.get("/companies/{company_id}/board", response_model=list[KanbanColumnWithTasksOut])
+async def get_board(company_id: int, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(KanbanColumn)
+        .outerjoin(KanbanColumn.tasks)
+        .options(contains_eager(KanbanColumn.tasks))
+        .where(KanbanColumn.company_id == company_id)
+        .order_by(KanbanColumn.id, KanbanTask.id)
+    )
+    return result.unique().scalars().all()
 
 
 # ----------------------
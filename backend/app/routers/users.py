@@ -1,17 +1,19 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 from sqlalchemy.future import select
-from typing import List
+from typing import Dict, List
 import logging
-from sqlalchemy import delete
+from sqlalchemy import delete, func, insert, update
 from datetime import datetime, timedelta
 
 from app.database import (
-    SessionLocal,
+    get_db,
     User,
     UserOut,
+    UserListOut,
     Group,
     Tool,
     Project,
@@ -22,15 +24,13 @@ from app.database import (
     DocumentPermission,
     EditUserRequest
 )
+from app.services.principals import invalidate_user
+from app.services.pagination import Keyset, PageParams, page_params
+from app.services.serialization import fast_json
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
 
-# Dependency for async DB session
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
-
 
 def calculate_end(start: datetime, value: int, unit: str) -> datetime:
     if unit == "hour":
@@ -46,51 +46,66 @@ def calculate_end(start: datetime, value: int, unit: str) -> datetime:
 
 
 # List all users (basic)
+user_keyset = Keyset(User.id)
+
+
 @router.get("", response_model=List[UserOut])
-async def list_users(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User))
-    return result.scalars().all()
+async def list_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(user_keyset.apply(select(User), page))
+    return user_keyset.finish(result.scalars().all(), page, response)
 
 
 # List users by company with detailed info
-@router.get("/by-company/{company_id}", response_model=List[UserOut])
+user_list_out = TypeAdapter(List[UserListOut])
+
+
+@router.get("/by-company/{company_id}", response_model=List[UserListOut], response_class=ORJSONResponse)
 async def get_users_by_company(company_id: int, db: AsyncSession = Depends(get_db)):
-    stmt = select(User).where(User.company_id == company_id).options(
-        selectinload(User.group_memberships).selectinload(GroupMember.group),
-        selectinload(User.tool_permissions).selectinload(ToolPermission.tool),
-        selectinload(User.project_memberships).selectinload(ProjectMember.project),
-        selectinload(User.document_permissions).selectinload(DocumentPermission.document),
+    # Plain column projections instead of ORM graphs: one query for the users
+    # and one per grant type, assembled into dicts and validated once.
+    users = await db.execute(
+        select(User.id, User.email, User.full_name, User.role, User.is_active, User.contract_expiry)
+        .where(User.company_id == company_id)
+        .order_by(User.id)
     )
-    users = (await db.execute(stmt)).scalars().all()
-
-    results = []
-    for u in users:
-        results.append(UserOut(
-            id=u.id,
-            email=u.email,
-            full_name=u.full_name,
-            role=u.role,
-            is_active=u.is_active,
-            contract_expiry=u.contract_expiry,
-            groups=[gm.group.name for gm in u.group_memberships],
-            tools=[{
-                "name": tp.tool.title,
-                "access_start": tp.access_start,
-                "access_end": tp.access_end
-            } for tp in u.tool_permissions],
-            projects=[{
-                "name": pm.project.name,
-                "access_start": pm.access_start,
-                "access_end": pm.access_end
-            } for pm in u.project_memberships],
-            documents=[{
-                "name": dp.document.path,
-                "access_start": dp.access_start,
-                "access_end": dp.access_end
-            } for dp in u.document_permissions],
-        ))
-
-    return results
+    results = {
+        row.id: {**row._asdict(), "groups": [], "tools": [], "projects": [], "documents": []}
+        for row in users
+    }
+
+    in_company = User.company_id == company_id
+    groups = await db.execute(
+        select(GroupMember.user_id, Group.name)
+        .join(Group, Group.id == GroupMember.group_id)
+        .join(User, User.id == GroupMember.user_id)
+        .where(in_company)
+    )
+    for user_id, name in groups:
+        # Users added after the first query are skipped, not a KeyError.
+        if user_id in results:
+            results[user_id]["groups"].append(name)
+
+    grants = [
+        ("tools", ToolPermission, Tool.title, Tool.id == ToolPermission.tool_id),
+        ("projects", ProjectMember, Project.name, Project.id == ProjectMember.project_id),
+        ("documents", DocumentPermission, DriveFile.path, DriveFile.id == DocumentPermission.document_id),
+    ]
+    for key, model, name_column, on_clause in grants:
+        rows = await db.execute(
+            select(model.user_id, name_column, model.access_start, model.access_end)
+            .join(name_column.class_, on_clause)
+            .join(User, User.id == model.user_id)
+            .where(in_company)
+        )
+        for user_id, name, access_start, access_end in rows:
+            if user_id in results:
+                results[user_id][key].append({"name": name, "access_start": access_start, "access_end": access_end})
+
+    return fast_json(user_list_out, results.values())
 
 
 
@@ -104,9 +119,57 @@ async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
 
     await db.delete(user)
     await db.commit()
+    invalidate_user(user_id)
 
     return {"message": f"User with ID {user_id} deleted successfully."}
 
+
+# ----------------------
+# Grant diffing helpers
+# ----------------------
+async def resolve_ids(db: AsyncSession, name_column, id_column, names: List[str]) -> Dict[str, int]:
+    """Map names to ids in one query; duplicate names resolve to the lowest id."""
+    if not names:
+        return {}
+    result = await db.execute(
+        select(name_column, func.min(id_column))
+        .where(name_column.in_(set(names)))
+        .group_by(name_column)
+    )
+    return dict(result.all())
+
+
+async def sync_grants(db: AsyncSession, model, target: str, user_id: int, desired: Dict[int, dict]) -> Dict[str, int]:
+    """Bring ``user_id``'s rows of ``model`` in line with ``desired``.
+
+    Rows for targets that are still wanted keep their id and only get their
+    access window updated; the rest is one bulk delete and one bulk insert.
+    """
+    target_column = getattr(model, target)
+    current = await db.execute(
+        select(model.id, target_column).where(model.user_id == user_id).order_by(model.id)
+    )
+
+    kept, stale = {}, []
+    for row_id, target_id in current.all():
+        if target_id in desired and target_id not in kept:
+            kept[target_id] = row_id
+        else:
+            stale.append(row_id)
+
+    inserts = [{"user_id": user_id, target: t, **values} for t, values in desired.items() if t not in kept]
+    updates = [{"id": kept[t], **values} for t, values in desired.items() if t in kept and values]
+
+    if stale:
+        await db.execute(delete(model).where(model.id.in_(stale)))
+    if inserts:
+        await db.execute(insert(model), inserts)
+    if updates:
+        await db.execute(update(model), updates)
+
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(stale)}
+
+
 @router.put("/{user_id}")
 async def edit_user(user_id: int, data: EditUserRequest, db: AsyncSession = Depends(get_db)):
     logging.info(f"Received edit request for user_id={user_id} with data: {data}")
@@ -120,57 +183,32 @@ async def edit_user(user_id: int, data: EditUserRequest, db: AsyncSession = Depe
     now = datetime.utcnow()
     user.contract_expiry = calculate_end(now, data.contract_duration.value, data.contract_duration.unit)
 
-    # Clear previous assignments
-    await db.execute(delete(GroupMember).where(GroupMember.user_id == user_id))
-    await db.execute(delete(ToolPermission).where(ToolPermission.user_id == user_id))
-    await db.execute(delete(ProjectMember).where(ProjectMember.user_id == user_id))
-    await db.execute(delete(DocumentPermission).where(DocumentPermission.user_id == user_id))
-
-    # Groups
-    for group_name in data.groups:
-        group_result = await db.execute(select(Group).where(Group.name == group_name))
-        group = group_result.scalars().first()
-        if group:
-            db.add(GroupMember(user_id=user_id, group_id=group.id))
-
-    # Tools
-    for t in data.tools:
-        tool_result = await db.execute(select(Tool).where(Tool.title == t.name))
-        tool = tool_result.scalars().first()
-        if tool:
-            access_end = calculate_end(now, t.duration.value, t.duration.unit)
-            db.add(ToolPermission(
-                user_id=user_id,
-                tool_id=tool.id,
-                access_start=now,
-                access_end=access_end
-            ))
-
-    # Projects
-    for p in data.projects:
-        project_result = await db.execute(select(Project).where(Project.name == p.name))
-        project = project_result.scalars().first()
-        if project:
-            access_end = calculate_end(now, p.duration.value, p.duration.unit)
-            db.add(ProjectMember(
-                user_id=user_id,
-                project_id=project.id,
-                access_start=now,
-                access_end=access_end
-            ))
-
-    # Documents
-    for d in data.documents:
-        doc_result = await db.execute(select(DriveFile).where(DriveFile.path == d.name))
-        doc = doc_result.scalars().first()
-        if doc:
-            access_end = calculate_end(now, d.duration.value, d.duration.unit)
-            db.add(DocumentPermission(
-                user_id=user_id,
-                document_id=doc.id,
-                access_start=now,
-                access_end=access_end
-            ))
+    def window(duration) -> dict:
+        return {"access_start": now, "access_end": calculate_end(now, duration.value, duration.unit)}
+
+    # Resolve every name with one IN query per entity type
+    group_ids = await resolve_ids(db, Group.name, Group.id, data.groups)
+    tool_ids = await resolve_ids(db, Tool.title, Tool.id, [t.name for t in data.tools])
+    project_ids = await resolve_ids(db, Project.name, Project.id, [p.name for p in data.projects])
+    document_ids = await resolve_ids(db, DriveFile.path, DriveFile.id, [d.name for d in data.documents])
+
+    # Desired state: target id -> access window (groups have none)
+    changes = {
+        "groups": await sync_grants(db, GroupMember, "group_id", user_id, {
+            group_ids[name]: {} for name in data.groups if name in group_ids
+        }),
+        "tools": await sync_grants(db, ToolPermission, "tool_id", user_id, {
+            tool_ids[t.name]: window(t.duration) for t in data.tools if t.name in tool_ids
+        }),
+        "projects": await sync_grants(db, ProjectMember, "project_id", user_id, {
+            project_ids[p.name]: window(p.duration) for p in data.projects if p.name in project_ids
+        }),
+        "documents": await sync_grants(db, DocumentPermission, "document_id", user_id, {
+            document_ids[d.name]: window(d.duration) for d in data.documents if d.name in document_ids
+        }),
+    }
+    logging.info(f"Applied grant changes for user_id={user_id}: {changes}")
 
     await db.commit()
+    invalidate_user(user_id)
     return {"message": "User updated successfully"}
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""One-off backfill: give every company that has no Kanban columns the default board.
+
+    python -m app.scripts.backfill_kanban_boards
+"""
+import asyncio
+import os
+
+from app.database import SessionLocal, engine
+from app.services.kanban import companies_without_board, provision_default_board
+
+BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "500"))
+
+
+async def backfill():
+    total = 0
+    while True:
+        async with SessionLocal() as db:
+            company_ids = await companies_without_board(db, BATCH_SIZE)
+            for company_id in company_ids:
+                await provision_default_board(db, company_id)
+            await db.commit()
+        total += len(company_ids)
+        if len(company_ids) < BATCH_SIZE:
+            break
+    await engine.dispose()
+    print(f"✅ Provisioned default boards for {total} companies.")
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
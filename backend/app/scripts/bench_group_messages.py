@@ -0,0 +1,94 @@
+"""Regression benchmark: group message history must cost a constant number of queries.
+
+Seeds groups of increasing size into a throwaway database (in-memory SQLite
+unless BENCH_DATABASE_URL is set), loads a full page of each history through the real
+handler and fails if the statement count grows with the number of messages.
+
+    pip install -r requirements-dev.txt  # aiosqlite for the SQLite default
+    python -m app.scripts.bench_group_messages
+"""
+import asyncio
+import os
+import sys
+import time
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("DATABASE_URL", BENCH_DATABASE_URL)
+
+from fastapi import Response
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, Company, Group, GroupMessage, User
+from app.routers.groups import get_group_messages
+from app.services.pagination import PAGE_SIZE_MAX, PageParams
+
+SIZES = [10, 200, 2000]
+
+
+async def seed(db: AsyncSession, size: int) -> int:
+    company = Company(
+        company_name=f"Bench {size}", email=f"bench{size}@example.com",
+        owner_full_name="Bench Owner", password_hash="x",
+    )
+    db.add(company)
+    await db.flush()
+    users = [
+        User(email=f"u{size}-{i}@example.com", full_name=f"User {i}", role="staff",
+             password_hash="x", company_id=company.id)
+        for i in range(10)
+    ]
+    group = Group(name=f"Group {size}", company_id=company.id)
+    db.add_all(users + [group])
+    await db.flush()
+
+    await db.execute(insert(GroupMessage), [
+        {
+            "group_id": group.id,
+            "content": f"message {i}",
+            # every fifth message is posted by the company account
+            "sender_user_id": None if i % 5 == 0 else users[i % len(users)].id,
+            "sender_company_id": company.id if i % 5 == 0 else None,
+        }
+        for i in range(size)
+    ])
+    await db.commit()
+    return group.id
+
+
+async def main() -> int:
+    kwargs = {"poolclass": StaticPool} if BENCH_DATABASE_URL == "sqlite+aiosqlite://" else {}
+    bench_engine = create_async_engine(BENCH_DATABASE_URL, **kwargs)
+    statements = []
+    event.listen(bench_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    counts = {}
+    try:
+        for size in SIZES:
+            async with AsyncSession(bench_engine, expire_on_commit=False) as db:
+                group_id = await seed(db, size)
+
+            async with AsyncSession(bench_engine) as db:
+                statements.clear()
+                start = time.perf_counter()
+                messages = await get_group_messages(group_id, Response(), PageParams(None, PAGE_SIZE_MAX), db=db)
+                elapsed = time.perf_counter() - start
+
+            assert len(messages) == min(size, PAGE_SIZE_MAX) and all(m.sender_name for m in messages)
+            counts[size] = len(statements)
+            print(f"{size:>6} messages: {len(statements)} queries, {elapsed * 1000:.1f} ms")
+    finally:
+        await bench_engine.dispose()
+
+    if len(set(counts.values())) != 1:
+        print(f"❌ Query count grows with history size: {counts}")
+        return 1
+    print("✅ Query count is constant in the number of messages.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
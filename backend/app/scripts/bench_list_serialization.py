@@ -0,0 +1,203 @@
+"""Benchmark: ORM-graph list endpoints vs. the projection + orjson path.
+
+Seeds one large tenant into a throwaway database (in-memory SQLite unless
+BENCH_DATABASE_URL is set), then requests users-by-company, groups and
+projects through both the previous implementation (kept here for comparison)
+and the current routers. Checks that both return the same JSON.
+
+    pip install -r requirements-dev.txt  # aiosqlite for the SQLite default
+    BENCH_USERS=5000 python -m app.scripts.bench_list_serialization
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("DATABASE_URL", BENCH_DATABASE_URL)
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+
+from app.database import (
+    Base, get_db, Company, User, UserOut, Group, GroupMember, GroupMemberOut, GroupOut,
+    Project, ProjectMember, ProjectOut, Tool, ToolPermission, DriveFile, DocumentPermission,
+)
+from app.routers import groups, projects, users
+
+BENCH_USERS = int(os.getenv("BENCH_USERS", "2000"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+
+# ----------------------
+# Previous implementations
+# ----------------------
+legacy = FastAPI()
+
+
+@legacy.get("/users/by-company/{company_id}", response_model=List[UserOut])
+async def legacy_users_by_company(company_id: int, db: AsyncSession = Depends(get_db)):
+    stmt = select(User).where(User.company_id == company_id).order_by(User.id).options(
+        selectinload(User.group_memberships).selectinload(GroupMember.group),
+        selectinload(User.tool_permissions).selectinload(ToolPermission.tool),
+        selectinload(User.project_memberships).selectinload(ProjectMember.project),
+        selectinload(User.document_permissions).selectinload(DocumentPermission.document),
+    )
+    return [UserOut(
+        id=u.id, email=u.email, full_name=u.full_name, role=u.role,
+        is_active=u.is_active, contract_expiry=u.contract_expiry,
+        groups=[gm.group.name for gm in u.group_memberships],
+        tools=[{"name": tp.tool.title, "access_start": tp.access_start, "access_end": tp.access_end}
+               for tp in u.tool_permissions],
+        projects=[{"name": pm.project.name, "access_start": pm.access_start, "access_end": pm.access_end}
+                  for pm in u.project_memberships],
+        documents=[{"name": dp.document.path, "access_start": dp.access_start, "access_end": dp.access_end}
+                   for dp in u.document_permissions],
+    ) for u in (await db.execute(stmt)).scalars().all()]
+
+
+@legacy.get("/groups", response_model=List[GroupOut])
+async def legacy_groups(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(Group).order_by(Group.id).options(selectinload(Group.members).selectinload(GroupMember.user))
+    )
+    return [GroupOut(
+        id=g.id, name=g.name, created_at=g.created_at,
+        members=[GroupMemberOut(id=m.id, user_id=m.user_id, full_name=m.user.full_name)
+                 for m in sorted(g.members, key=lambda m: m.id) if m.user],
+    ) for g in result.scalars().unique().all()]
+
+
+@legacy.get("/projects", response_model=List[ProjectOut])
+async def legacy_projects(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(Project).order_by(Project.id).options(selectinload(Project.members).selectinload(ProjectMember.user))
+    )
+    return [ProjectOut(
+        id=p.id, name=p.name, end_date=p.end_date, status=p.status, company_id=p.company_id,
+        created_by_user_id=p.created_by_user_id, created_by_company_id=p.created_by_company_id,
+        created_at=p.created_at,
+        members=[UserOut(id=m.user.id, email=m.user.email, full_name=m.user.full_name, role=m.user.role,
+                               is_active=m.user.is_active, contract_expiry=m.user.contract_expiry)
+                 for m in sorted(p.members, key=lambda m: m.id)],
+    ) for p in result.scalars().unique().all()]
+
+
+# ----------------------
+# Seed
+# ----------------------
+async def seed(db: AsyncSession) -> int:
+    now = datetime(2026, 1, 1)
+    window = {"access_start": now, "access_end": now + timedelta(days=30)}
+    company = Company(company_name="Bench", email="bench@example.com", owner_full_name="Owner", password_hash="x")
+    db.add(company)
+    await db.flush()
+
+    user_ids = (await db.execute(insert(User).returning(User.id, sort_by_parameter_order=True), [
+        {"email": f"user{i}@example.com", "full_name": f"User {i}", "role": "staff", "password_hash": "x",
+         "company_id": company.id, "is_active": True, "contract_expiry": now + timedelta(days=365)}
+        for i in range(BENCH_USERS)
+    ])).scalars().all()
+    group_ids = (await db.execute(insert(Group).returning(Group.id, sort_by_parameter_order=True), [
+        {"name": f"Group {i}", "company_id": company.id, "created_at": now} for i in range(20)
+    ])).scalars().all()
+    tool_ids = (await db.execute(insert(Tool).returning(Tool.id, sort_by_parameter_order=True), [
+        {"title": f"Tool {i}"} for i in range(10)
+    ])).scalars().all()
+    project_ids = (await db.execute(insert(Project).returning(Project.id, sort_by_parameter_order=True), [
+        {"name": f"Project {i}", "end_date": now, "status": "active", "company_id": company.id, "created_at": now}
+        for i in range(20)
+    ])).scalars().all()
+    document_ids = (await db.execute(insert(DriveFile).returning(DriveFile.id, sort_by_parameter_order=True), [
+        {"filename": f"doc{i}", "filetype": "pdf", "path": f"My Drive/doc{i}", "company_id": company.id}
+        for i in range(10)
+    ])).scalars().all()
+
+    await db.execute(insert(GroupMember), [
+        {"user_id": u, "group_id": group_ids[(i + k) % len(group_ids)]}
+        for i, u in enumerate(user_ids) for k in range(2)
+    ])
+    await db.execute(insert(ToolPermission), [
+        {"user_id": u, "tool_id": tool_ids[(i + k) % len(tool_ids)], **window}
+        for i, u in enumerate(user_ids) for k in range(3)
+    ])
+    await db.execute(insert(ProjectMember), [
+        {"user_id": u, "project_id": project_ids[i % len(project_ids)], **window}
+        for i, u in enumerate(user_ids)
+    ])
+    await db.execute(insert(DocumentPermission), [
+        {"user_id": u, "document_id": document_ids[i % len(document_ids)], **window}
+        for i, u in enumerate(user_ids)
+    ])
+    await db.commit()
+    return company.id
+
+
+async def timed(client: httpx.AsyncClient, path: str):
+    best, body = None, None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        response = await client.get(path)
+        elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        best = elapsed if best is None else min(best, elapsed)
+        body = response.json()
+    return best, body
+
+
+async def main() -> int:
+    kwargs = {"poolclass": StaticPool} if BENCH_DATABASE_URL == "sqlite+aiosqlite://" else {}
+    bench_engine = create_async_engine(BENCH_DATABASE_URL, **kwargs)
+    sessions = async_sessionmaker(bench_engine, expire_on_commit=False)
+
+    async def bench_db():
+        async with sessions() as session:
+            yield session
+
+    app = FastAPI()
+    for router in (users.router, groups.router, projects.router):
+        app.include_router(router)
+    app.mount("/legacy", legacy)
+    app.dependency_overrides[get_db] = bench_db
+    legacy.dependency_overrides[get_db] = bench_db
+
+    try:
+        async with bench_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessions() as db:
+            company_id = await seed(db)
+
+        failed = False
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{BENCH_USERS} users, best of {ROUNDS}:")
+            for name, path in [
+                ("users by company", f"/api/users/by-company/{company_id}"),
+                ("groups", "/api/groups"),
+                ("projects", "/api/projects"),
+            ]:
+                old_time, old_body = await timed(client, "/legacy" + path[len("/api"):])
+                new_time, new_body = await timed(client, path)
+                same = json.dumps(old_body, sort_keys=True) == json.dumps(new_body, sort_keys=True)
+                failed |= not same
+                print(f"  {name:<17} old {old_time * 1000:8.1f} ms   new {new_time * 1000:8.1f} ms   "
+                      f"x{old_time / new_time:4.1f}   {'same output' if same else 'OUTPUT DIFFERS'}")
+    finally:
+        await bench_engine.dispose()
+
+    if failed:
+        print("❌ New endpoints do not match the previous output.")
+        return 1
+    print("✅ Outputs match.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,115 @@
+"""Benchmark: chat message ingest, one commit per message vs. group commit.
+
+Posts BENCH_MESSAGES group and team messages from BENCH_CONCURRENCY
+concurrent senders through the real handlers, first with batching off and
+then on, and reports messages per second. Uses a throwaway SQLite file
+unless BENCH_DATABASE_URL is set (an in-memory database would hide the
+per-commit cost this is about).
+
+    pip install -r requirements-dev.txt  # aiosqlite for the SQLite default
+    BENCH_CONCURRENCY=50 python -m app.scripts.bench_message_ingest
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix="bench_ingest_")
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", f"sqlite+aiosqlite:///{BENCH_DIR}/bench.db")
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from app.database import Base, SessionLocal, engine, Company, Group, GroupMessage, Message, Team, User
+from app.routers import groups, messages
+
+BENCH_MESSAGES = int(os.getenv("BENCH_MESSAGES", "2000"))
+BENCH_CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "50"))
+
+
+async def seed() -> dict:
+    async with SessionLocal() as db:
+        company = Company(company_name="Bench", email="bench@example.com", owner_full_name="Owner", password_hash="x")
+        db.add(company)
+        await db.flush()
+        user = User(email="sender@example.com", full_name="Sender", role="staff", password_hash="x",
+                    company_id=company.id)
+        group = Group(name="Busy channel", company_id=company.id)
+        team = Team(name="Busy team", company_id=company.id)
+        db.add_all([user, group, team])
+        await db.commit()
+        return {"user_id": user.id, "group_id": group.id, "team_id": team.id}
+
+
+async def run(client: httpx.AsyncClient, path: str, body) -> float:
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(BENCH_MESSAGES):
+        queue.put_nowait(i)
+
+    async def sender():
+        while not queue.empty():
+            i = queue.get_nowait()
+            response = await client.post(path, json=body(i))
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(BENCH_CONCURRENCY)))
+    return time.perf_counter() - start
+
+
+async def count(model) -> int:
+    async with SessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+async def main() -> int:
+    app = FastAPI()
+    app.include_router(groups.router)
+    app.include_router(messages.router, prefix="/api")
+    batchers = [groups.group_message_batcher, messages.message_batcher]
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        ids = await seed()
+
+        cases = [
+            ("group messages", "/api/groups/messages", GroupMessage,
+             lambda i: {"group_id": ids["group_id"], "content": f"message {i}", "sender_user_id": ids["user_id"]}),
+            ("team messages", "/api/messages", Message,
+             lambda i: {"team_id": ids["team_id"], "sender_id": ids["user_id"], "content": f"message {i}"}),
+        ]
+
+        failed = False
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            print(f"{BENCH_MESSAGES} messages from {BENCH_CONCURRENCY} concurrent senders:")
+            for name, path, model, body in cases:
+                rates = {}
+                for batched in (False, True):
+                    for batcher in batchers:
+                        batcher.enabled = batched
+                    before = await count(model)
+                    elapsed = await run(client, path, body)
+                    written = await count(model) - before
+                    failed |= written != BENCH_MESSAGES
+                    rates[batched] = BENCH_MESSAGES / elapsed
+                print(f"  {name:<15} single {rates[False]:8.0f} msg/s   batched {rates[True]:8.0f} msg/s   "
+                      f"x{rates[True] / rates[False]:4.1f}")
+        print(f"  batches: {groups.group_message_batcher.stats()}")
+    finally:
+        for batcher in batchers:
+            await batcher.stop()
+        await engine.dispose()
+
+    if failed:
+        print("❌ Some messages were not written.")
+        return 1
+    print("✅ Every message was written in both modes.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,19 @@
+import asyncio
+import logging
+
+from app.database import engine
+from app.migrations import run_migrations, SCHEMA_VERSION
+
+
+async def migrate():
+    print("🔄 Applying database migrations...")
+    applied = await run_migrations(engine)
+    await engine.dispose()
+    if applied:
+        print(f"✅ Applied migrations {applied}; schema is at version {SCHEMA_VERSION}.")
+    else:
+        print(f"✅ Schema already at version {SCHEMA_VERSION}.")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate())
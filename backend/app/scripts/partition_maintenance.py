@@ -0,0 +1,29 @@
+"""Create upcoming message partitions and archive expired ones now, instead of waiting for the periodic job.
+
+    python -m app.scripts.partition_maintenance               # uses PARTITION_RETENTION_MONTHS
+    python -m app.scripts.partition_maintenance 24            # archive partitions older than 24 months
+"""
+import asyncio
+import logging
+import sys
+
+from app.database import engine
+from app.services.partitions import PARTITION_ARCHIVE_SCHEMA, PARTITION_RETENTION_MONTHS, run_partition_maintenance
+
+
+async def maintain(retention_months: int):
+    if engine.dialect.name != "postgresql":
+        print("❌ Partitioning is only used on PostgreSQL.")
+        return
+    result = await run_partition_maintenance(engine, retention_months)
+    await engine.dispose()
+    if "skipped" in result:
+        print(f"❌ Skipped: {result['skipped']}.")
+        return
+    print(f"✅ Created {len(result['created'])} partitions: {', '.join(result['created']) or '-'}")
+    print(f"✅ Archived {len(result['archived'])} partitions to schema {PARTITION_ARCHIVE_SCHEMA}: "
+          f"{', '.join(result['archived']) or '-'}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(maintain(int(sys.argv[1]) if len(sys.argv) > 1 else PARTITION_RETENTION_MONTHS))
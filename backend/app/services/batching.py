@@ -0,0 +1,120 @@
+# app/services/batching.py
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_BATCHING = os.getenv("MESSAGE_BATCHING", "false").lower() == "true"
+MESSAGE_BATCH_WINDOW_MS = float(os.getenv("MESSAGE_BATCH_WINDOW_MS", "5"))
+MESSAGE_BATCH_MAX = int(os.getenv("MESSAGE_BATCH_MAX", "100"))
+
+
+class InsertBatcher:
+    """Group commit for single-row inserts.
+
+    Rows submitted within MESSAGE_BATCH_WINDOW_MS of each other (or until
+    MESSAGE_BATCH_MAX are waiting) are written with one multi-row
+    ``INSERT ... RETURNING`` and one commit, on a session of the batcher's own.
+    ``on_flush(db, rows)`` runs in that same transaction just before the
+    commit; whatever it returns per row is handed back to the matching
+    ``submit`` caller (the inserted ORM row itself if there is no hook).
+    If a batch fails, its rows are retried one by one so a single bad row
+    only fails its own request.
+    """
+
+    def __init__(
+        self,
+        model,
+        on_flush: Optional[Callable[[AsyncSession, List[Any]], Awaitable[List[Any]]]] = None,
+        enabled: bool = MESSAGE_BATCHING,
+    ):
+        self.model = model
+        self.on_flush = on_flush
+        self.enabled = enabled
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes: Set[asyncio.Task] = set()
+        self.rows = 0
+        self.batches = 0
+        self.largest_batch = 0
+        # Multi-row batches that failed and were retried row by row
+        self.fallback_batches = 0
+        # Rows that could not be written even on their own
+        self.failed_rows = 0
+
+    async def submit(self, values: dict) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((values, future))
+        if len(self._pending) >= MESSAGE_BATCH_MAX:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(MESSAGE_BATCH_WINDOW_MS / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._write(batch))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: List[Tuple[dict, asyncio.Future]]):
+        try:
+            async with SessionLocal() as db:
+                result = await db.execute(
+                    insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                    [values for values, _ in batch],
+                )
+                rows = result.scalars().all()
+                results = await self.on_flush(db, rows) if self.on_flush else rows
+                await db.commit()
+        except Exception as e:
+            if len(batch) > 1:
+                self.fallback_batches += 1
+                logger.warning("Batched insert of %d %s rows failed (%s), retrying one by one",
+                               len(batch), self.model.__tablename__, e)
+                for item in batch:
+                    await self._write([item])
+                return
+            self.failed_rows += 1
+            future = batch[0][1]
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, future), value in zip(batch, results):
+            if not future.done():
+                future.set_result(value)
+
+    async def stop(self):
+        """Write whatever is still waiting and let in-flight batches finish."""
+        self._flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "window_ms": MESSAGE_BATCH_WINDOW_MS,
+            "rows": self.rows,
+            "batches": self.batches,
+            "mean_batch": round(self.rows / self.batches, 1) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "fallback_batches": self.fallback_batches,
+            "failed_rows": self.failed_rows,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,137 @@
+# app/services/http_client.py
+import importlib.util
+import os
+import time
+from typing import Dict
+
+import httpx
+
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true" and importlib.util.find_spec("h2") is not None
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_POOL_TIMEOUT_SECONDS = float(os.getenv("HTTP_POOL_TIMEOUT_SECONDS", "5"))
+
+# One pool per upstream so a slow provider can't starve connections to another.
+UPSTREAMS = {
+    "openrouter": {"max_connections": 50, "max_keepalive_connections": 20, "read_timeout": 60.0},
+    "canva": {"max_connections": 10, "max_keepalive_connections": 5, "read_timeout": 15.0},
+}
+
+
+class UpstreamMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.server_errors = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "server_errors": self.server_errors,
+            "in_flight": self.in_flight,
+            "avg_ms": round(1000 * self.total_seconds / self.requests, 2) if self.requests else 0.0,
+            "max_ms": round(1000 * self.max_seconds, 2),
+        }
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled transport to record latency up to response headers."""
+
+    def __init__(self, inner: httpx.AsyncHTTPTransport, metrics: UpstreamMetrics):
+        self._inner = inner
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        m = self.metrics
+        m.requests += 1
+        m.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception:
+            m.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            m.in_flight -= 1
+            m.total_seconds += elapsed
+            m.max_seconds = max(m.max_seconds, elapsed)
+        if response.status_code >= 500:
+            m.server_errors += 1
+        return response
+
+    def pool_stats(self) -> dict:
+        pool = getattr(self._inner, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "connections": len(connections),
+            "idle": sum(1 for c in connections if c.is_idle()),
+        }
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class HttpClients:
+    """Application-scoped ``httpx.AsyncClient`` per upstream, built at startup or on first use."""
+
+    def __init__(self, upstreams: dict):
+        self._config = upstreams
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, MeteredTransport] = {}
+        self._metrics = {name: UpstreamMetrics() for name in upstreams}
+
+    def start(self):
+        for name in self._config:
+            self.get(name)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._build(name)
+        return client
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        config = self._config[name]
+        inner = httpx.AsyncHTTPTransport(
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=config["max_connections"],
+                max_keepalive_connections=config["max_keepalive_connections"],
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            retries=1,
+        )
+        transport = self._transports[name] = MeteredTransport(inner, self._metrics[name])
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(
+                config["read_timeout"],
+                connect=HTTP_CONNECT_TIMEOUT_SECONDS,
+                pool=HTTP_POOL_TIMEOUT_SECONDS,
+            ),
+        )
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._transports.clear()
+
+    def stats(self) -> dict:
+        out = {"http2": HTTP2_ENABLED}
+        for name, metrics in self._metrics.items():
+            entry = {**metrics.as_dict(), "max_connections": self._config[name]["max_connections"]}
+            transport = self._transports.get(name)
+            if transport:
+                entry.update(transport.pool_stats())
+            out[name] = entry
+        return out
+
+
+http_clients = HttpClients(UPSTREAMS)
@@ -0,0 +1,35 @@
+# app/services/kanban.py
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import Company, KanbanColumn, KanbanTask
+
+
+DEFAULT_COLUMNS = ["To Do", "In Progress", "Done"]
+# Only "To Do" starts with tasks
+DEFAULT_TODO_TASKS = [
+    "2026 THD Admission",
+    "Design homepage",
+]
+
+
+async def provision_default_board(db: AsyncSession, company_id: int):
+    """Add the default columns and starter tasks for a new company; the caller commits."""
+    result = await db.execute(
+        insert(KanbanColumn).returning(KanbanColumn.id, sort_by_parameter_order=True),
+        [{"title": title, "company_id": company_id} for title in DEFAULT_COLUMNS],
+    )
+    todo_column_id = result.scalars().first()
+    await db.execute(insert(KanbanTask), [
+        {"content": content, "column_id": todo_column_id, "company_id": company_id}
+        for content in DEFAULT_TODO_TASKS
+    ])
+
+
+async def companies_without_board(db: AsyncSession, limit: int) -> List[int]:
+    has_columns = select(KanbanColumn.id).where(KanbanColumn.company_id == Company.id).exists()
+    result = await db.execute(select(Company.id).where(~has_columns).order_by(Company.id).limit(limit))
+    return list(result.scalars().all())
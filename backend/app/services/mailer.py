@@ -0,0 +1,189 @@
+# app/services/mailer.py
+import asyncio
+import logging
+import os
+import smtplib
+import time
+from dataclasses import dataclass
+from email.message import Message
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+
+# The defaults talk to Gmail over implicit TLS. For local testing point these
+# at a stand-in such as aiosmtpd: SMTP_HOST=localhost SMTP_PORT=8025 SMTP_USE_SSL=false
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "true").lower() == "true"
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() == "true"
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", os.getenv("FROM_EMAIL"))
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", os.getenv("EMAIL_PASSWORD"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "20"))
+SMTP_IDLE_TIMEOUT_SECONDS = float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "30"))
+
+MAIL_QUEUE_MAX = int(os.getenv("MAIL_QUEUE_MAX", "1000"))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "5"))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", "2"))
+MAIL_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("MAIL_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingMail:
+    message: Message
+    attempts: int = 0
+
+
+class MailDispatcher:
+    """Background SMTP sender fed by an in-memory queue.
+
+    Handlers call ``enqueue`` and return immediately. A single worker drains
+    the queue in batches over one authenticated SMTP session, which is kept
+    open between batches until it has been idle for SMTP_IDLE_TIMEOUT_SECONDS.
+    Failed messages are retried with exponential backoff.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=MAIL_QUEUE_MAX)
+        self._task: Optional[asyncio.Task] = None
+        self._retries_pending = 0
+        self._smtp: Optional[smtplib.SMTP] = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+        self.connections_opened = 0
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        deadline = time.monotonic() + MAIL_SHUTDOWN_TIMEOUT_SECONDS
+        while not self._queue.empty() and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self._close)
+
+    # ---------- Producer side ----------
+    def enqueue(self, message: Message):
+        self.start()
+        try:
+            self._queue.put_nowait(OutgoingMail(message))
+        except asyncio.QueueFull:
+            logger.error("Mail queue full, dropping message to %s", message["To"])
+            raise HTTPException(status_code=503, detail="Email service is busy, please retry shortly.")
+
+    # ---------- Worker ----------
+    async def _run(self):
+        while True:
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=SMTP_IDLE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self._close)
+                continue
+
+            batch = [first]
+            while len(batch) < MAIL_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                failures = await asyncio.to_thread(self._send_batch, batch)
+            except Exception as e:
+                failures = [(item, e) for item in batch]
+            self.batches += 1
+
+            for item, error in failures:
+                self._schedule_retry(item, error)
+
+    def _schedule_retry(self, item: OutgoingMail, error: Exception):
+        item.attempts += 1
+        if item.attempts >= MAIL_MAX_ATTEMPTS:
+            self.failed += 1
+            logger.error("❌ Email to %s failed after %d attempts: %s", item.message["To"], item.attempts, error)
+            return
+
+        delay = MAIL_RETRY_BASE_SECONDS * (2 ** (item.attempts - 1))
+        self.retried += 1
+        self._retries_pending += 1
+        logger.warning("Email to %s failed (%s), retrying in %.0fs", item.message["To"], error, delay)
+        asyncio.get_running_loop().call_later(delay, self._requeue, item)
+
+    def _requeue(self, item: OutgoingMail):
+        self._retries_pending -= 1
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._schedule_retry(item, RuntimeError("mail queue full"))
+
+    # ---------- SMTP (runs in a worker thread) ----------
+    def _connect(self) -> smtplib.SMTP:
+        if SMTP_USE_SSL:
+            smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        else:
+            smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+            if SMTP_STARTTLS:
+                smtp.starttls()
+        if SMTP_USERNAME and SMTP_PASSWORD:
+            smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        self.connections_opened += 1
+        return smtp
+
+    def _session(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                self._close()
+        self._smtp = self._connect()
+        return self._smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _send_batch(self, batch: List[OutgoingMail]) -> list:
+        failures = []
+        smtp = self._session()
+        for item in batch:
+            try:
+                try:
+                    smtp.send_message(item.message)
+                except smtplib.SMTPServerDisconnected:
+                    self._close()
+                    smtp = self._session()
+                    smtp.send_message(item.message)
+                self.sent += 1
+            except Exception as e:
+                failures.append((item, e))
+        return failures
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "retries_pending": self._retries_pending,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches,
+            "connections_opened": self.connections_opened,
+            "connected": self._smtp is not None,
+        }
+
+
+mail_dispatcher = MailDispatcher()
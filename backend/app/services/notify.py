@@ -0,0 +1,99 @@
+# app/services/notify.py
+import asyncio
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Hashable, Iterator, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+LONG_POLL_MAX_SECONDS = float(os.getenv("LONG_POLL_MAX_SECONDS", "30"))
+# Ids are handed out at insert but rows become visible at commit, so a message
+# can show up after one with a higher id. since_id reads re-send what was
+# written this recently at or below since_id; clients de-duplicate by id.
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "10"))
+
+
+class ChangeNotifier:
+    """Per-key wake-ups for long-polling requests within this process."""
+
+    def __init__(self):
+        self._events: Dict[Hashable, asyncio.Event] = {}
+        self._watchers: Dict[Hashable, int] = {}
+        self.notifications = 0
+        self.wakeups = 0
+        self.timeouts = 0
+
+    @contextmanager
+    def watch(self, key: Hashable) -> Iterator[asyncio.Event]:
+        """Event set by the next ``notify(key)``; take it *before* querying so nothing slips through."""
+        event = self._events.get(key)
+        if event is None:
+            event = self._events[key] = asyncio.Event()
+        self._watchers[key] = self._watchers.get(key, 0) + 1
+        try:
+            yield event
+        finally:
+            self._watchers[key] -= 1
+            if not self._watchers[key]:
+                del self._watchers[key]
+                if self._events.get(key) is event:
+                    del self._events[key]
+
+    def notify(self, key: Hashable):
+        self.notifications += 1
+        event = self._events.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def stats(self) -> dict:
+        return {
+            "keys_watched": len(self._watchers),
+            "waiting": sum(self._watchers.values()),
+            "notifications": self.notifications,
+            "wakeups": self.wakeups,
+            "timeouts": self.timeouts,
+        }
+
+
+def sync_overlap_cutoff() -> datetime:
+    """Lower ``timestamp`` bound of the window re-read behind ``since_id``."""
+    return datetime.utcnow() - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+
+
+async def poll_since(
+    db: AsyncSession,
+    notifier: ChangeNotifier,
+    key: Hashable,
+    wait: float,
+    fetch: Callable[[], Awaitable[List]],
+    fetch_overlap: Optional[Callable[[], Awaitable[List]]] = None,
+) -> List:
+    """Return ``fetch_overlap() + fetch()``.
+
+    ``fetch`` reads rows after ``since_id``; while it finds none, park up to
+    ``wait`` seconds for ``notify(key)`` and read again. ``fetch_overlap``
+    re-reads recent rows at or below ``since_id`` (see SYNC_OVERLAP_SECONDS)
+    and on its own never ends the wait.
+    """
+    async def overlap() -> List:
+        return await fetch_overlap() if fetch_overlap else []
+
+    with notifier.watch(key) as changed:
+        rows = await fetch()
+        if rows or wait <= 0:
+            return await overlap() + rows
+
+        # Don't hold a pooled connection while parked.
+        await db.close()
+        try:
+            await asyncio.wait_for(changed.wait(), min(wait, LONG_POLL_MAX_SECONDS))
+            notifier.wakeups += 1
+        except asyncio.TimeoutError:
+            notifier.timeouts += 1
+
+    # A writer may just have committed on the primary; don't race replica lag.
+    db.sync_session.use_replica = False
+    rows = await fetch()
+    return await overlap() + rows
@@ -0,0 +1,143 @@
+# app/services/oauth_state.py
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, insert
+
+from app.database import SessionLocal, OAuthState
+
+
+OAUTH_STATE_BACKEND = os.getenv("OAUTH_STATE_BACKEND", "memory")
+OAUTH_STATE_MAX_ENTRIES = int(os.getenv("OAUTH_STATE_MAX_ENTRIES", "10000"))
+OAUTH_STATE_SWEEP_INTERVAL_SECONDS = float(os.getenv("OAUTH_STATE_SWEEP_INTERVAL_SECONDS", "60"))
+
+
+class StateStore(ABC):
+    """Short-lived storage for OAuth ``state`` values between start and callback."""
+
+    @abstractmethod
+    async def put(self, state: str, data: dict, expires: datetime):
+        ...
+
+    @abstractmethod
+    async def pop(self, state: str) -> Optional[dict]:
+        """Remove and return the data for ``state``, or None if unknown or expired."""
+
+    @abstractmethod
+    async def sweep(self) -> int:
+        """Drop expired entries and return how many were removed."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryStateStore(StateStore):
+    """Per-process store. Only correct when running a single worker."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: dict = {}
+        self._last_sweep = 0.0
+        self.evicted = 0
+        self.expired = 0
+
+    async def put(self, state: str, data: dict, expires: datetime):
+        if (len(self._entries) >= self.max_entries
+                or time.monotonic() - self._last_sweep > OAUTH_STATE_SWEEP_INTERVAL_SECONDS):
+            await self.sweep()
+        while len(self._entries) >= self.max_entries:
+            # Entries share one TTL, so the oldest entry is the closest to expiring.
+            del self._entries[next(iter(self._entries))]
+            self.evicted += 1
+        self._entries[state] = {**data, "expires": expires}
+
+    async def pop(self, state: str) -> Optional[dict]:
+        entry = self._entries.pop(state, None)
+        if not entry or entry["expires"] < datetime.utcnow():
+            return None
+        return {k: v for k, v in entry.items() if k != "expires"}
+
+    async def sweep(self) -> int:
+        # Walk from the oldest entry and stop at the first live one, so a sweep
+        # costs O(expired) rather than O(size).
+        self._last_sweep = time.monotonic()
+        now = datetime.utcnow()
+        removed = 0
+        while self._entries:
+            state = next(iter(self._entries))
+            if self._entries[state]["expires"] >= now:
+                break
+            del self._entries[state]
+            removed += 1
+        self.expired += removed
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+class DatabaseStateStore(StateStore):
+    """Store backed by the ``oauth_states`` table, shared by every worker.
+
+    Lookups go through the primary key and ``pop`` is a single
+    DELETE ... RETURNING, so a state can only ever be redeemed once.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self._last_sweep = 0.0
+        self.expired = 0
+
+    async def put(self, state: str, data: dict, expires: datetime):
+        if time.monotonic() - self._last_sweep > OAUTH_STATE_SWEEP_INTERVAL_SECONDS:
+            await self.sweep()
+        async with SessionLocal() as db:
+            await db.execute(insert(OAuthState).values(
+                state=state, provider=self.provider, payload=data, expires=expires
+            ))
+            await db.commit()
+
+    async def pop(self, state: str) -> Optional[dict]:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                delete(OAuthState)
+                .where(
+                    OAuthState.state == state,
+                    OAuthState.provider == self.provider,
+                    OAuthState.expires > datetime.utcnow(),
+                )
+                .returning(OAuthState.payload)
+            )
+            payload = result.scalar_one_or_none()
+            await db.commit()
+        return payload
+
+    async def sweep(self) -> int:
+        self._last_sweep = time.monotonic()
+        async with SessionLocal() as db:
+            result = await db.execute(
+                delete(OAuthState).where(OAuthState.expires < datetime.utcnow())
+            )
+            await db.commit()
+        self.expired += result.rowcount or 0
+        return result.rowcount or 0
+
+    def stats(self) -> dict:
+        return {"backend": "database", "provider": self.provider, "expired": self.expired}
+
+
+def create_state_store(provider: str) -> StateStore:
+    if OAUTH_STATE_BACKEND == "database":
+        return DatabaseStateStore(provider)
+    if OAUTH_STATE_BACKEND == "memory":
+        return InMemoryStateStore(OAUTH_STATE_MAX_ENTRIES)
+    raise ValueError(f"Unknown OAUTH_STATE_BACKEND: {OAUTH_STATE_BACKEND}")
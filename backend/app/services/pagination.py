@@ -0,0 +1,95 @@
+# app/services/pagination.py
+import base64
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Column, DateTime, tuple_
+from sqlalchemy.sql import Select
+
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class PageParams:
+    after: Optional[str]
+    limit: Optional[int]
+
+    @property
+    def size(self) -> int:
+        # Always bounded: callers that send no limit get PAGE_SIZE_DEFAULT rows and a cursor.
+        return min(self.limit or PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX)
+
+
+def page_params(
+    after: Optional[str] = Query(None, description="Opaque cursor from a previous X-Next-Cursor header"),
+    limit: Optional[int] = Query(None, ge=1, description=f"Page size, capped at {PAGE_SIZE_MAX}"),
+) -> PageParams:
+    return PageParams(after=after, limit=limit)
+
+
+# ----------------------
+# Cursor encoding
+# ----------------------
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, columns: Sequence[Column]) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("cursor shape")
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else column.type.python_type(value)
+            for column, value in zip(columns, payload)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+
+# ----------------------
+# Keyset
+# ----------------------
+class Keyset:
+    """Keyset pagination over ``columns``; the last one must be unique (normally ``id``)."""
+
+    def __init__(self, *columns, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+
+    def apply(self, stmt: Select, page: PageParams) -> Select:
+        if page.after is not None:
+            values = decode_cursor(page.after, [c.expression for c in self.columns])
+            if len(self.columns) == 1:
+                left, right = self.columns[0], values[0]
+            else:
+                left, right = tuple_(*self.columns), tuple_(*values)
+            stmt = stmt.where(left < right if self.descending else left > right)
+        order = [c.desc() for c in self.columns] if self.descending else self.columns
+        # One extra row tells us whether another page exists.
+        return stmt.order_by(*order).limit(page.size + 1)
+
+    def finish(
+        self,
+        items: List[Any],
+        page: PageParams,
+        response: Response,
+        key: Optional[Callable[[Any], Sequence[Any]]] = None,
+    ) -> List[Any]:
+        if len(items) <= page.size:
+            return items
+        items = items[:page.size]
+        last = items[-1]
+        values = key(last) if key else [getattr(last, c.key) for c in self.columns]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(values)
+        return items
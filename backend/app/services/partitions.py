@@ -0,0 +1,189 @@
+# app/services/partitions.py
+"""Monthly range partitions for the chat message tables (PostgreSQL only).
+
+Partitions are named ``<table>_y<year>m<month>`` and cover one calendar month
+of ``timestamp``. Maintenance keeps PARTITION_MONTHS_AHEAD months created in
+advance and, if PARTITION_RETENTION_MONTHS is set, detaches older partitions
+and moves them to the PARTITION_ARCHIVE_SCHEMA schema, where they can be
+dumped or dropped without touching the live tables.
+
+Rows from before partitioning stay in one ``<table>_legacy`` partition that
+covers everything below its upper bound; monthly partitions start there, and
+retention never archives it.
+"""
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.database import engine
+from app.services.periodic import PeriodicTask
+
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("group_messages", "messages")
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# 0 keeps every partition attached
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "0"))
+PARTITION_ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "21600"))
+# Window served by the recent-history endpoints, so they only read the newest partitions
+RECENT_HISTORY_DAYS = int(os.getenv("RECENT_HISTORY_DAYS", "30"))
+
+# Arbitrary key for pg_try_advisory_lock so only one worker runs maintenance at a time.
+PARTITION_LOCK_KEY = 0x42470002
+
+PARTITION_NAME = re.compile(r"^(?P<table>.+)_y(?P<year>\d{4})m(?P<month>\d{2})$")
+UPPER_BOUND = re.compile(r"TO \('(?P<bound>[^']+)'\)")
+
+
+# ----------------------
+# Months
+# ----------------------
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def legacy_partition_name(table: str) -> str:
+    return f"{table}_legacy"
+
+
+def recent_cutoff(days: int) -> datetime:
+    """Lower ``timestamp`` bound for recent-history reads; lets the planner skip older partitions."""
+    return datetime.utcnow() - timedelta(days=days)
+
+
+# ----------------------
+# DDL
+# ----------------------
+async def create_partition(conn: AsyncConnection, table: str, month: datetime) -> Optional[str]:
+    """Create the partition of ``table`` for ``month`` unless it exists; return its name if created."""
+    name = partition_name(table, month)
+    exists = await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})
+    if exists.scalar() is not None:
+        return None
+    await conn.execute(text(
+        f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    ))
+    logger.info("Created partition %s", name)
+    return name
+
+
+async def legacy_upper_bound(conn: AsyncConnection, table: str) -> Optional[datetime]:
+    """Where ``table``'s legacy partition ends, or None if it has none."""
+    result = await conn.execute(
+        text(
+            "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_class c "
+            "WHERE c.relname = :name AND c.relispartition"
+        ),
+        {"name": legacy_partition_name(table)},
+    )
+    bound = result.scalar_one_or_none()
+    match = UPPER_BOUND.search(bound) if bound else None
+    return datetime.fromisoformat(match["bound"]) if match else None
+
+
+async def ensure_partitions(conn: AsyncConnection, table: str, first: datetime, last: datetime) -> List[str]:
+    """Create every missing monthly partition from ``first`` to ``last`` inclusive.
+
+    Months the legacy partition already covers are skipped.
+    """
+    created = []
+    month = month_start(first)
+    floor = await legacy_upper_bound(conn, table)
+    if floor is not None:
+        month = max(month, floor)
+    while month <= last:
+        name = await create_partition(conn, table, month)
+        if name:
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+async def child_tables(conn: AsyncConnection, table: str) -> List[str]:
+    """Every partition of ``table``, the legacy one included."""
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    return list(result.scalars())
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> List[Tuple[str, datetime]]:
+    """The monthly partitions of ``table`` with the month each covers, oldest first."""
+    partitions = []
+    for name in await child_tables(conn, table):
+        match = PARTITION_NAME.match(name)
+        if match and match["table"] == table:
+            partitions.append((name, datetime(int(match["year"]), int(match["month"]), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def archive_partition(conn: AsyncConnection, table: str, name: str):
+    await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{PARTITION_ARCHIVE_SCHEMA}"'))
+    await conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+    await conn.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{PARTITION_ARCHIVE_SCHEMA}"'))
+    logger.info("Archived partition %s to schema %s", name, PARTITION_ARCHIVE_SCHEMA)
+
+
+# ----------------------
+# Maintenance
+# ----------------------
+async def run_partition_maintenance(
+    db_engine: AsyncEngine = engine,
+    retention_months: int = PARTITION_RETENTION_MONTHS,
+) -> dict:
+    """Create upcoming partitions and archive expired ones; a no-op off PostgreSQL."""
+    if db_engine.dialect.name != "postgresql":
+        return {}
+
+    created, archived = [], []
+    async with db_engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = await lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+        if not locked.scalar():
+            return {"skipped": "another worker is running partition maintenance"}
+        try:
+            current = month_start(datetime.utcnow())
+            cutoff = add_months(current, -retention_months) if retention_months > 0 else None
+            for table in PARTITIONED_TABLES:
+                async with db_engine.begin() as conn:
+                    created += await ensure_partitions(conn, table, current, add_months(current, PARTITION_MONTHS_AHEAD))
+                if cutoff is None:
+                    continue
+                async with db_engine.connect() as conn:
+                    expired = [name for name, month in await list_partitions(conn, table) if month < cutoff]
+                for name in expired:
+                    # One transaction per partition keeps each lock on the parent short.
+                    async with db_engine.begin() as conn:
+                        await archive_partition(conn, table, name)
+                    archived.append(name)
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PARTITION_LOCK_KEY})
+    return {"created": created, "archived": archived}
+
+
+partition_maintenance = PeriodicTask(
+    "partition-maintenance", PARTITION_MAINTENANCE_INTERVAL_SECONDS, run_partition_maintenance
+)
@@ -0,0 +1,112 @@
+# app/services/passwords.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    At most ``max_pending`` operations may be queued or running at once;
+    anything beyond that is rejected with a 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._peak_queue_depth = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    def _timed(self, fn, *args):
+        with self._lock:
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._total_seconds += time.perf_counter() - start
+                self._running -= 1
+
+    async def _submit(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        self._peak_queue_depth = max(self._peak_queue_depth, self._pending - self.max_workers)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, fn, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(pwd_context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._submit(pwd_context.verify, password, password_hash)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        # Submit in windows of one task per worker so a large batch can't
+        # trip admission control by itself.
+        hashes = []
+        for i in range(0, len(passwords), self.max_workers):
+            window = passwords[i:i + self.max_workers]
+            hashes.extend(await asyncio.gather(*(self.hash(p) for p in window)))
+        return hashes
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "running": self._running,
+            "queue_depth": max(0, self._pending - self._running),
+            "peak_queue_depth": max(0, self._peak_queue_depth),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_ms": round(1000 * self._total_seconds / self._completed, 2) if self._completed else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    return await password_hasher.verify(password, password_hash)
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    return await password_hasher.hash_many(passwords)
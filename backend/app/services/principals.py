@@ -0,0 +1,78 @@
+# app/services/principals.py
+import os
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import User, Company
+from app.services.cache import TTLCache
+
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+# Column values of User / Company rows keyed by ("user", id) or ("company", id).
+# Only plain data is cached; every hit builds a fresh, session-less instance, so
+# requests never share (or mutate) one object. The cache is per process, so the
+# TTL bounds how stale another worker can be after a mutation it did not see.
+principal_cache = TTLCache(PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Display names of message senders, keyed the same way. Names rarely change,
+# so these live longer than the principals themselves.
+SENDER_NAME_CACHE_TTL_SECONDS = float(os.getenv("SENDER_NAME_CACHE_TTL_SECONDS", "300"))
+sender_name_cache = TTLCache(PRINCIPAL_CACHE_MAX_ENTRIES, SENDER_NAME_CACHE_TTL_SECONDS)
+
+
+def snapshot(row) -> dict:
+    return {column.key: getattr(row, column.key) for column in row.__table__.columns}
+
+
+def get_cached_user(user_id: int) -> Optional[User]:
+    values = principal_cache.get(("user", user_id))
+    return User(**values) if values is not None else None
+
+
+def cache_user(user) -> User:
+    """Cache ``user``'s columns and return a session-less copy built from them."""
+    values = snapshot(user)
+    principal_cache.set(("user", user.id), values)
+    return User(**values)
+
+
+def invalidate_user(user_id: int):
+    principal_cache.invalidate(("user", user_id))
+    sender_name_cache.invalidate(("user", user_id))
+
+
+def get_cached_company(company_id: int) -> Optional[Company]:
+    values = principal_cache.get(("company", company_id))
+    return Company(**values) if values is not None else None
+
+
+def cache_company(company) -> Company:
+    """Cache ``company``'s columns and return a session-less copy built from them."""
+    values = snapshot(company)
+    principal_cache.set(("company", company.id), values)
+    return Company(**values)
+
+
+def invalidate_company(company_id: int):
+    principal_cache.invalidate(("company", company_id))
+    sender_name_cache.invalidate(("company", company_id))
+
+
+async def get_sender_name(db: AsyncSession, user_id: Optional[int], company_id: Optional[int]) -> Optional[str]:
+    if user_id:
+        key, stmt = ("user", user_id), select(User.full_name).where(User.id == user_id)
+    elif company_id:
+        key, stmt = ("company", company_id), select(Company.company_name).where(Company.id == company_id)
+    else:
+        return None
+
+    name = sender_name_cache.get(key)
+    if name is None:
+        name = (await db.execute(stmt)).scalar_one_or_none()
+        if name is not None:
+            sender_name_cache.set(key, name)
+    return name
@@ -0,0 +1,92 @@
+# app/services/read_markers.py
+from collections import Counter
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal, or_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import GroupMember, GroupMessage, GroupReadMarker
+
+
+MARKER_KEY = [GroupReadMarker.user_id, GroupReadMarker.group_id]
+
+
+def _upsert(db: AsyncSession):
+    return postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+
+
+async def record_sent_messages(db: AsyncSession, messages: Sequence[GroupMessage]):
+    """Bump every other member's unread counter; a sender has read up to their own message.
+
+    Runs in the transaction that inserts ``messages``, with one statement per
+    (group, sender) rather than per message. Only members get markers, so a
+    sender who is not in the group gets none.
+    """
+    insert = _upsert(db)
+
+    read_up_to = {}
+    for msg in messages:
+        if msg.sender_user_id is not None:
+            key = (msg.sender_user_id, msg.group_id)
+            read_up_to[key] = max(read_up_to.get(key, 0), msg.id)
+    for (user_id, group_id), message_id in read_up_to.items():
+        sender = (
+            select(GroupMember.user_id, GroupMember.group_id, literal(message_id), literal(0))
+            .where(GroupMember.group_id == group_id, GroupMember.user_id == user_id)
+            .distinct()
+        )
+        stmt = insert(GroupReadMarker).from_select(
+            ["user_id", "group_id", "last_read_message_id", "unread_count"], sender
+        )
+        await db.execute(stmt.on_conflict_do_update(index_elements=MARKER_KEY, set_={
+            "last_read_message_id": stmt.excluded.last_read_message_id,
+            "unread_count": 0,
+            "updated_at": func.now(),
+        }))
+
+    for (group_id, sender_id), count in Counter((m.group_id, m.sender_user_id) for m in messages).items():
+        recipients = (
+            select(GroupMember.user_id, literal(group_id), literal(count))
+            .where(GroupMember.group_id == group_id, GroupMember.user_id.isnot(None))
+            .distinct()
+        )
+        if sender_id is not None:
+            recipients = recipients.where(GroupMember.user_id != sender_id)
+        stmt = insert(GroupReadMarker).from_select(["user_id", "group_id", "unread_count"], recipients)
+        await db.execute(stmt.on_conflict_do_update(index_elements=MARKER_KEY, set_={
+            "unread_count": GroupReadMarker.unread_count + stmt.excluded.unread_count,
+            "updated_at": func.now(),
+        }))
+
+
+async def mark_read(db: AsyncSession, user_id: int, group_id: int, up_to: Optional[int] = None) -> Tuple[int, int]:
+    """Move the user's marker to ``up_to`` (default: newest message) and recount what is left unread."""
+    if up_to is None:
+        newest = await db.execute(
+            select(func.coalesce(func.max(GroupMessage.id), 0)).where(GroupMessage.group_id == group_id)
+        )
+        up_to = newest.scalar_one()
+
+    unread = (
+        select(func.count())
+        .select_from(GroupMessage)
+        .where(
+            GroupMessage.group_id == group_id,
+            GroupMessage.id > up_to,
+            or_(GroupMessage.sender_user_id.is_(None), GroupMessage.sender_user_id != user_id),
+        )
+        .scalar_subquery()
+    )
+    stmt = _upsert(db)(GroupReadMarker).values(
+        user_id=user_id, group_id=group_id, last_read_message_id=up_to, unread_count=unread,
+    )
+    stmt = stmt.on_conflict_do_update(index_elements=MARKER_KEY, set_={
+        "last_read_message_id": stmt.excluded.last_read_message_id,
+        "unread_count": stmt.excluded.unread_count,
+        "updated_at": func.now(),
+    })
+    result = await db.execute(stmt.returning(GroupReadMarker.last_read_message_id, GroupReadMarker.unread_count))
+    return tuple(result.one())
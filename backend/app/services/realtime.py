@@ -0,0 +1,245 @@
+# app/services/realtime.py
+import asyncio
+import json
+import logging
+import os
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Set
+
+from fastapi import WebSocket
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import DATABASE_URL
+
+
+logger = logging.getLogger(__name__)
+
+WS_SEND_QUEUE_MAX = int(os.getenv("WS_SEND_QUEUE_MAX", "100"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+LISTEN_RECONNECT_MAX_SECONDS = float(os.getenv("LISTEN_RECONNECT_MAX_SECONDS", "30"))
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_PAYLOAD_MAX = 7900
+
+# Close code for subscribers dropped for falling behind (RFC 6455 "try again later")
+WS_CLOSE_TOO_SLOW = 1013
+
+
+class Subscriber:
+    def __init__(self, topic: int):
+        self.topic = topic
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(WS_SEND_QUEUE_MAX)
+        self.overflowed = False
+
+    def offer(self, payload: str) -> bool:
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            # Falling behind: drop what is queued and tell the pump to
+            # disconnect, so the client resyncs from history instead.
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+
+class TopicHub:
+    """In-process WebSocket subscriptions per topic (e.g. group id), fanned out across workers.
+
+    On PostgreSQL, ``publish`` sends NOTIFY on ``channel`` and every worker,
+    including this one, delivers to its local subscribers from a LISTEN
+    connection. Other databases deliver locally only. Payloads too large for
+    NOTIFY travel as a reference that ``load_payload`` turns back into JSON.
+    ``on_message``, if given, is called with the topic of every message this
+    worker sees, whether or not anyone here is subscribed.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        load_payload: Callable[[int], Awaitable[Optional[str]]],
+        on_message: Optional[Callable[[int], None]] = None,
+    ):
+        self.channel = channel
+        self.load_payload = load_payload
+        self.on_message = on_message
+        self.fan_out = make_url(DATABASE_URL).get_backend_name() == "postgresql"
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self.listener_connected = False
+        self.listener_reconnects = 0
+        self.connections_total = 0
+        self.published = 0
+        self.notifications = 0
+        self.deliveries = 0
+        self.slow_consumer_drops = 0
+
+    # ----------------------
+    # Subscriptions
+    # ----------------------
+    @contextmanager
+    def subscribe(self, topic: int) -> Iterator[Subscriber]:
+        subscriber = Subscriber(topic)
+        self._subscribers.setdefault(topic, set()).add(subscriber)
+        self.connections_total += 1
+        try:
+            yield subscriber
+        finally:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def deliver(self, topic: int, payload: str):
+        for subscriber in list(self._subscribers.get(topic, ())):
+            if subscriber.overflowed:
+                continue
+            if subscriber.offer(payload):
+                self.deliveries += 1
+            else:
+                self.slow_consumer_drops += 1
+
+    async def serve(self, websocket: WebSocket, topic: int):
+        """Pump published payloads to ``websocket`` until either side goes away."""
+        with self.subscribe(topic) as subscriber:
+            receiver = asyncio.ensure_future(self._drain_client(websocket))
+            try:
+                while True:
+                    getter = asyncio.ensure_future(subscriber.queue.get())
+                    done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                    if receiver in done:
+                        getter.cancel()
+                        return
+                    payload = getter.result()
+                    if payload is None:
+                        await websocket.close(code=WS_CLOSE_TOO_SLOW, reason="Client too slow, resync from history")
+                        return
+                    try:
+                        await asyncio.wait_for(websocket.send_text(payload), WS_SEND_TIMEOUT_SECONDS)
+                    except asyncio.TimeoutError:
+                        self.slow_consumer_drops += 1
+                        await websocket.close(code=WS_CLOSE_TOO_SLOW, reason="Client too slow, resync from history")
+                        return
+            finally:
+                receiver.cancel()
+
+    @staticmethod
+    async def _drain_client(websocket: WebSocket):
+        # Clients only listen; reading is how we notice they went away.
+        # receive() rather than receive_text(), which raises KeyError on binary frames.
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    # ----------------------
+    # Publishing
+    # ----------------------
+    async def publish(self, db: AsyncSession, topic: int, ref: int, payload: str, commit: bool = True):
+        """Publish ``payload`` for ``topic``; ``ref`` is what ``load_payload`` takes if it is too large.
+
+        With ``commit=False`` delivery waits for the caller's transaction to commit.
+        """
+        self.published += 1
+        if not self.fan_out:
+            if commit:
+                self._deliver_local(topic, payload)
+            else:
+                event.listen(db.sync_session, "after_commit",
+                             lambda _: self._deliver_local(topic, payload), once=True)
+            return
+
+        message = json.dumps({"topic": topic, "data": payload})
+        if len(message.encode()) > NOTIFY_PAYLOAD_MAX:
+            message = json.dumps({"topic": topic, "ref": ref})
+        await db.execute(select(func.pg_notify(self.channel, message)))
+        if commit:
+            await db.commit()
+
+    def _deliver_local(self, topic: int, payload: str):
+        if self.on_message:
+            self.on_message(topic)
+        self.deliver(topic, payload)
+
+    def _on_notify(self, connection, pid, channel, message):
+        self.notifications += 1
+        notification = json.loads(message)
+        if self.on_message:
+            self.on_message(notification["topic"])
+        if "data" in notification:
+            self.deliver(notification["topic"], notification["data"])
+        elif notification["topic"] in self._subscribers:
+            asyncio.ensure_future(self._deliver_ref(notification["topic"], notification["ref"]))
+
+    async def _deliver_ref(self, topic: int, ref: int):
+        try:
+            payload = await self.load_payload(ref)
+        except Exception:
+            logger.exception("Could not load %s payload %s", self.channel, ref)
+            return
+        if payload is not None:
+            self.deliver(topic, payload)
+
+    # ----------------------
+    # LISTEN connection
+    # ----------------------
+    def start(self):
+        if self.fan_out and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self):
+        import asyncpg
+
+        dsn = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        backoff = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                lost = asyncio.get_running_loop().create_future()
+                connection.add_termination_listener(lambda _: lost.done() or lost.set_result(None))
+                await connection.add_listener(self.channel, self._on_notify)
+                self.listener_connected = True
+                backoff = 1.0
+                logger.info("Listening for %s notifications", self.channel)
+                await lost
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN connection for %s failed", self.channel)
+            finally:
+                self.listener_connected = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            # Messages published while disconnected are missed; clients resync from history.
+            self.listener_reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, LISTEN_RECONNECT_MAX_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "channel": self.channel,
+            "fan_out": self.fan_out,
+            "listener_connected": self.listener_connected,
+            "listener_reconnects": self.listener_reconnects,
+            "topics": len(self._subscribers),
+            "connections": sum(len(s) for s in self._subscribers.values()),
+            "connections_total": self.connections_total,
+            "published": self.published,
+            "notifications": self.notifications,
+            "deliveries": self.deliveries,
+            "slow_consumer_drops": self.slow_consumer_drops,
+        }
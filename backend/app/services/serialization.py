@@ -0,0 +1,18 @@
+# app/services/serialization.py
+from typing import Any, Iterable, Optional
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+
+def fast_json(adapter: TypeAdapter, rows: Iterable[Any], response: Optional[Response] = None) -> ORJSONResponse:
+    """Validate plain dict rows once against ``adapter`` and serialize them with orjson.
+
+    Returning a Response skips FastAPI's own response_model validation and
+    encoding pass. Headers set on the injected ``response`` (e.g. the
+    pagination cursor) are carried over.
+    """
+    content = adapter.dump_python(adapter.validate_python(rows))
+    headers = dict(response.headers) if response is not None else None
+    return ORJSONResponse(content, headers=headers)
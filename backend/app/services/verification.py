@@ -0,0 +1,150 @@
+# app/services/verification.py
+import asyncio
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+from sqlalchemy import delete, or_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import SessionLocal, VerificationToken
+from app.services.periodic import PeriodicTask
+
+
+VERIFICATION_CODE_TTL_MINUTES = int(os.getenv("VERIFICATION_CODE_TTL_MINUTES", "10"))
+VERIFICATION_RESEND_INTERVAL_SECONDS = int(os.getenv("VERIFICATION_RESEND_INTERVAL_SECONDS", "60"))
+VERIFICATION_PURGE_INTERVAL_SECONDS = float(os.getenv("VERIFICATION_PURGE_INTERVAL_SECONDS", "600"))
+VERIFICATION_PURGE_BATCH_SIZE = int(os.getenv("VERIFICATION_PURGE_BATCH_SIZE", "1000"))
+
+
+class VerificationStats:
+    def __init__(self):
+        self.issued = 0
+        self.throttled = 0
+        self.verified = 0
+        self.rejected = 0
+        self.purged = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+stats = VerificationStats()
+
+
+# ----------------------
+# Issue / consume
+# ----------------------
+def _upsert(db: AsyncSession):
+    return postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+
+
+async def issue_code(db: AsyncSession, email: str, deliver: Callable[[str], Awaitable[None]]) -> str:
+    """Create a fresh code for ``email``, replacing any code issued before.
+
+    Raises 429 when the previous code is younger than the resend interval, so
+    repeated clicks don't create rows or send more email. The check and the
+    write are one upsert on the unique email index, so concurrent requests
+    for the same address can't both pass it. The code is committed before
+    ``deliver(code)`` runs; if delivery raises (e.g. 503 from a full mail
+    queue) the code is deleted again, so the caller can retry straight away.
+    """
+    now = datetime.utcnow()
+    code = f"{secrets.randbelow(10 ** 6):06d}"
+    insert = _upsert(db)
+    stmt = insert(VerificationToken).values(
+        email=email,
+        token=code,
+        created_at=now,
+        expires_at=now + timedelta(minutes=VERIFICATION_CODE_TTL_MINUTES),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VerificationToken.email],
+        set_={
+            "token": stmt.excluded.token,
+            "created_at": stmt.excluded.created_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=or_(
+            VerificationToken.created_at.is_(None),
+            VerificationToken.created_at <= now - timedelta(seconds=VERIFICATION_RESEND_INTERVAL_SECONDS),
+        ),
+    ).returning(VerificationToken.id)
+    token_id = (await db.execute(stmt)).scalar_one_or_none()
+
+    if token_id is None:
+        result = await db.execute(select(VerificationToken.created_at).where(VerificationToken.email == email))
+        last_issued = result.scalar_one_or_none() or now
+        await db.rollback()
+        stats.throttled += 1
+        retry_after = VERIFICATION_RESEND_INTERVAL_SECONDS - int((now - last_issued).total_seconds())
+        raise HTTPException(
+            status_code=429,
+            detail="A code was sent recently, please wait before requesting another.",
+            headers={"Retry-After": str(max(1, retry_after))},
+        )
+    await db.commit()
+
+    try:
+        await deliver(code)
+    except Exception:
+        await db.execute(delete(VerificationToken).where(
+            VerificationToken.id == token_id,
+            VerificationToken.token == code,
+        ))
+        await db.commit()
+        raise
+    stats.issued += 1
+    return code
+
+
+async def consume_code(db: AsyncSession, email: str, code: str) -> bool:
+    result = await db.execute(
+        delete(VerificationToken)
+        .where(
+            VerificationToken.email == email,
+            VerificationToken.token == code,
+            VerificationToken.expires_at > datetime.utcnow(),
+        )
+        .returning(VerificationToken.id)
+    )
+    consumed = result.first() is not None
+    await db.commit()
+    if consumed:
+        stats.verified += 1
+    else:
+        stats.rejected += 1
+    return consumed
+
+
+# ----------------------
+# Purge
+# ----------------------
+async def purge_expired_tokens(batch_size: int = VERIFICATION_PURGE_BATCH_SIZE) -> int:
+    """Delete expired rows in batches so no single statement holds locks for long."""
+    total = 0
+    while True:
+        async with SessionLocal() as db:
+            expired_ids = (
+                select(VerificationToken.id)
+                .where(VerificationToken.expires_at < datetime.utcnow())
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = await db.execute(delete(VerificationToken).where(VerificationToken.id.in_(expired_ids)))
+            await db.commit()
+        deleted = result.rowcount or 0
+        total += deleted
+        if deleted < batch_size:
+            break
+        await asyncio.sleep(0)
+    stats.purged += total
+    return total
+
+
+token_purger = PeriodicTask("verification-token-purge", VERIFICATION_PURGE_INTERVAL_SECONDS, purge_expired_tokens)
@@ -1,3 +1,5 @@
 #!/bin/sh
+set -e
 echo "Starting BrandGenie Backend..."
+python -m app.scripts.migrate
 exec uvicorn app.main:app --host 0.0.0.0 --port 5000
@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+# app.database refuses to import without a URL; nothing here touches it.
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.routers import copilot
+from app.routers.auth import get_current_tenant
+from app.services.cache import SingleFlight, TTLCache
+
+
+class StubClients:
+    """Stands in for ``http_clients`` so requests go to a ``MockTransport``."""
+
+    def __init__(self, handler):
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        return self.client
+
+
+@pytest.fixture(autouse=True)
+def fresh_copilot_state(monkeypatch):
+    monkeypatch.setattr(copilot, "response_cache", TTLCache(100, 60))
+    monkeypatch.setattr(copilot, "in_flight", SingleFlight())
+
+
+def completion(content: str) -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+@pytest.mark.anyio
+async def test_identical_prompts_in_flight_share_one_upstream_call(monkeypatch):
+    calls = 0
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return httpx.Response(200, json=completion("Fresh caption"))
+
+    monkeypatch.setattr(copilot, "http_clients", StubClients(handler))
+
+    # Same prompt once whitespace is normalized.
+    first = asyncio.ensure_future(copilot.cached_copilot_response("Write a  caption"))
+    second = asyncio.ensure_future(copilot.cached_copilot_response("Write a caption\n"))
+    while calls == 0:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await first == ("Fresh caption", False)
+    assert await second == ("Fresh caption", False)
+    assert calls == 1
+    assert copilot.in_flight.stats()["coalesced"] == 1
+
+    # The result is cached for the next caller.
+    assert await copilot.cached_copilot_response(" Write a caption ") == ("Fresh caption", True)
+    assert calls == 1
+
+    # Case is significant, so this is a different prompt.
+    assert await copilot.cached_copilot_response("WRITE A CAPTION") == ("Fresh caption", False)
+    assert calls == 2
+
+
+@pytest.mark.anyio
+async def test_stream_relays_upstream_deltas_as_sse_frames(monkeypatch):
+    upstream = "".join([
+        ": OPENROUTER PROCESSING\n\n",
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n',
+        'data: {"choices": [{"delta": {"content": "Hello"}}]}\n\n',
+        'data: {"choices": [{"delta": {"content": " world"}}]}\n\n',
+        "data: [DONE]\n\n",
+    ])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=upstream, headers={"Content-Type": "text/event-stream"})
+
+    monkeypatch.setattr(copilot, "http_clients", StubClients(handler))
+
+    app = FastAPI()
+    app.include_router(copilot.router, prefix="/api")
+    app.dependency_overrides[get_current_tenant] = lambda: ("company", 1)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/copilot/chat/stream", json={"prompt": "Say hello"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    body = response.text
+    assert body.endswith("\n\n")
+    frames = body[:-2].split("\n\n")
+    assert frames[-1] == "data: [DONE]"
+    deltas = []
+    for frame in frames[:-1]:
+        assert frame.startswith("data: ") and "\n" not in frame
+        deltas.append(json.loads(frame[len("data: "):])["delta"])
+    assert deltas == ["Hello", " world"]
@@ -0,0 +1,91 @@
+import asyncio
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+from fastapi import HTTPException
+
+from app.services import mailer
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.received = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(mailer, "SMTP_HOST", controller.hostname)
+    monkeypatch.setattr(mailer, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(mailer, "SMTP_USE_SSL", False)
+    monkeypatch.setattr(mailer, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(mailer, "SMTP_USERNAME", None)
+    monkeypatch.setattr(mailer, "SMTP_PASSWORD", None)
+    yield handler
+    controller.stop()
+
+
+def message(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = f"Test {i}"
+    msg["From"] = "noreply@example.com"
+    msg["To"] = f"user{i}@example.com"
+    msg.set_content("hello")
+    return msg
+
+
+async def wait_until(condition, timeout: float = 5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.anyio
+async def test_queued_messages_are_sent_in_batches_over_one_connection(smtp_server, monkeypatch):
+    monkeypatch.setattr(mailer, "MAIL_BATCH_SIZE", 2)
+    dispatcher = mailer.MailDispatcher()
+    try:
+        for i in range(5):
+            dispatcher.enqueue(message(i))
+        await wait_until(lambda: dispatcher.sent == 5)
+    finally:
+        await dispatcher.stop()
+
+    assert sorted(smtp_server.received) == [[f"user{i}@example.com"] for i in range(5)]
+    stats = dispatcher.stats()
+    assert stats["batches"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["failed"] == 0
+
+
+@pytest.mark.anyio
+async def test_enqueue_rejects_with_503_when_queue_is_full(smtp_server, monkeypatch):
+    monkeypatch.setattr(mailer, "MAIL_QUEUE_MAX", 2)
+    dispatcher = mailer.MailDispatcher()
+    try:
+        dispatcher.enqueue(message(0))
+        dispatcher.enqueue(message(1))
+        with pytest.raises(HTTPException) as excinfo:
+            dispatcher.enqueue(message(2))
+        assert excinfo.value.status_code == 503
+
+        await wait_until(lambda: dispatcher.sent == 2)
+    finally:
+        await dispatcher.stop()
+
+    assert len(smtp_server.received) == 2
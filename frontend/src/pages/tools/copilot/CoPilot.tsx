@@ -35,6 +35,10 @@ const CoPilot: React.FC = () => {
     try {
       const res = await axios.post('https://brandgenie-backend-ene6c9htgcauegg3.westeurope-01.azurewebsites.net/api/copilot/chat', {
         prompt: input
+      }, {
+        headers: {
+          Authorization: `Bearer ${localStorage.getItem('token')}`,
+        },
       });
 
       setMessages([
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { DragDropContext, Droppable, Draggable, DropResult } from '@hello-pangea/dnd';
 import { FaTrash } from 'react-icons/fa';
+import { useUser } from '../../../context/UserContext';
 
 interface Task {
   id: number;
@@ -20,6 +21,9 @@ const API_URL = 'https://brandgenie-backend-ene6c9htgcauegg3.westeurope-01.azure
 
 
 const KanbanBoard: React.FC = () => {
+  const { user } = useUser();
+  // Company accounts are their own company; staff carry the company they belong to.
+  const companyId = user?.role === 'company' ? Number(user.id) : user?.company_id;
   const [columns, setColumns] = useState<Record<number, Column>>({});
   const [tasks, setTasks] = useState<Record<number, Task>>({});
   const [newTaskContent, setNewTaskContent] = useState('');
@@ -27,8 +31,10 @@ const KanbanBoard: React.FC = () => {
 
   // Load columns and tasks
   useEffect(() => {
+    if (companyId === undefined) return;
+
     const fetchColumnsAndTasks = async () => {
-      const colRes = await fetch(`${API_URL}/columns`);
+      const colRes = await fetch(`${API_URL}/columns?company_id=${companyId}`);
       const colData = await colRes.json();
       const newCols: Record<number, Column> = {};
       const newTasks: Record<number, Task> = {};
@@ -48,7 +54,7 @@ const KanbanBoard: React.FC = () => {
     };
 
     fetchColumnsAndTasks();
-  }, []);
+  }, [companyId]);
 
   const onDragEnd = (result: DropResult) => {
     const { source, destination, draggableId } = result;
@@ -90,7 +96,7 @@ const KanbanBoard: React.FC = () => {
     const res = await fetch(`${API_URL}/tasks`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ content: newTaskContent, column_id: columnId, company_id: 1 }),
+      body: JSON.stringify({ content: newTaskContent, column_id: columnId, company_id: companyId }),
     });
 
     const newTask: Task = await res.json();
@@ -126,7 +132,7 @@ const KanbanBoard: React.FC = () => {
     const res = await fetch(`${API_URL}/columns`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ title: newColumnTitle, company_id: 1 }),
+      body: JSON.stringify({ title: newColumnTitle, company_id: companyId }),
     });
 
     const newCol = await res.json();